@@ -1,22 +1,27 @@
 # candidates/generators.py
 from __future__ import annotations
 
-from typing import List, Tuple
+import heapq
+from typing import Dict, List, Tuple
 
 from domain.types import Candidate, Item
-from geometry.aabb import aabb_from_center
+from geometry.aabb import aabb_from_center_batch
 from geometry.free_rects import Rect, rect_area
 
 from candidates.patterns import (
+  build_pattern_pools,
   gen_140plus80,
   gen_3across,
   gen_3plus2,
   gen_zigzag,
-  is_140x120,
-  is_std_80x120,
+  split_pattern_items,
+  PATTERN_140P80_W,
   PATTERN_140P80_Z,
+  PATTERN_3ACROSS_W,
   PATTERN_3ACROSS_Z,
+  PATTERN_3P2_W,
   PATTERN_3P2_Z,
+  PATTERN_ZIGZAG_W,
   PATTERN_ZIGZAG_Z,
 )
 
@@ -31,16 +36,17 @@ def _anchors_for_rect(r: Rect, dx: float, dz: float) -> List[Tuple[float, float]
   if x1 < x0 - 1e-9 or z1 < z0 - 1e-9:
     return []
 
-  pts = [(x0, z0), (x1, z0), (x0, z1), (x1, z1)]
-  uniq: List[Tuple[float, float]] = []
-  seen = set()
-  for x, z in pts:
-    k = (round(x, 6), round(z, 6))
-    if k in seen:
-      continue
-    seen.add(k)
-    uniq.append((x, z))
-  return uniq
+  # углов всего 4 и совпадать они могут только попарно по оси: дубли по тому же
+  # ключу round(.., 6), что и раньше, но сравнением координат, без set из кортежей
+  same_x = round(x0, 6) == round(x1, 6)
+  same_z = round(z0, 6) == round(z1, 6)
+  if same_x and same_z:
+    return [(x0, z0)]
+  if same_x:
+    return [(x0, z0), (x0, z1)]
+  if same_z:
+    return [(x0, z0), (x1, z0)]
+  return [(x0, z0), (x1, z0), (x0, z1), (x1, z1)]
 
 
 def _z_anchors_for_len(rect: Rect, slot_len: float) -> List[float]:
@@ -51,94 +57,144 @@ def _z_anchors_for_len(rect: Rect, slot_len: float) -> List[float]:
   return [minZ, maxZ - slot_len]
 
 
-def _assign_pattern_id(pack: List[Candidate], pid: str) -> None:
+def _z_anchors_cached(cache: Dict[float, List[float]], rect: Rect, slot_len: float) -> List[float]:
+  # 3across/140plus80 (1.20) и 3plus2/zigzag (2.00) делят длину слота:
+  # якоря по Z на один rect считаем один раз на каждую длину
+  zs = cache.get(slot_len)
+  if zs is None:
+    zs = _z_anchors_for_len(rect, slot_len)
+    cache[slot_len] = zs
+  return zs
+
+
+def _assign_pattern_id(pack: List[Candidate], pid: int) -> None:
   """
   ВАЖНО: patternId должен быть уникальным на КАЖДЫЙ pack (группу),
   иначе _group_pattern_candidates() склеит альтернативные варианты в одну группу,
   и они начнут пересекаться между собой (pattern_internal_collision).
+  id — обычный int из счётчика: без f-строки на каждый pack и с дешёвым хешем в группировке.
   """
   for c in pack:
-    meta = c.get("meta")
-    if meta is None:
-      meta = {}
-      c["meta"] = meta
-    meta["patternId"] = pid
+    c.patternId = pid
+
+
+def _single_candidates(rects: List[Rect], items_subset: List[Item]) -> List[Candidate]:
+  """
+  SINGLE-фаза: одиночные паллеты в углах свободных прямоугольников.
+  Чистая арифметика по (паллета x поворот x rect x якорь) — самый горячий цикл генератора,
+  поэтому вынесена отдельно, а глобальные имена привязаны к локальным.
+  """
+  out: List[Candidate] = []
+  append = out.append
+  anchors_for = _anchors_for_rect
+  aabbs_for = aabb_from_center_batch
+
+  # ширина/длина прямоугольников и габариты паллет по обоим поворотам
+  # считаются один раз, а не в каждой итерации тройного цикла
+  rect_rows = [(r, r[1] - r[0], r[3] - r[2]) for r in rects]
+
+  # прямоугольники, куда не встаёт даже самая короткая сторона паллет окна,
+  # отбрасываем один раз, а не на каждую пару (паллета, поворот)
+  if items_subset:
+    min_side = min(min(float(it.width), float(it.length)) for it in items_subset)
+    rect_rows = [row for row in rect_rows if row[1] + 1e-9 >= min_side and row[2] + 1e-9 >= min_side]
+
+  for it in items_subset:
+    w, l, dy = float(it.width), float(it.length), float(it.height)
+
+    for rot, dx, dz in ((0, w, l), (90, l, w)):
+      hx, hz = dx / 2.0, dz / 2.0
+      y = 0.0
+      yc = y + dy / 2.0
+
+      for r, rect_w, rect_l in rect_rows:
+        if rect_w + 1e-9 < dx:
+          continue
+        if rect_l + 1e-9 < dz:
+          continue
+
+        anchors = anchors_for(r, dx, dz)
+        centers = [(ax + hx, yc, az + hz) for ax, az in anchors]
+        aabbs = aabbs_for(centers, dx, dy, dz)
+
+        for (x, _, z), aabb in zip(centers, aabbs):
+          append(Candidate(
+            itemId=it.id,
+            x=x, y=y, z=z,
+            rotationY=rot,
+            dx=dx, dy=dy, dz=dz,
+            aabb=aabb,
+            kind="single",
+            rect=r,
+          ))
+
+  return out
 
 
 def generate_floor_candidates(state, items_subset: List[Item]) -> List[Candidate]:
   out: List[Candidate] = []
 
-  rects = sorted(state.free_rects.list(), key=rect_area, reverse=True)[:250]
+  # top-250 по площади: частичная сортировка кучей вместо полной sorted()[:250]
+  rects = heapq.nlargest(250, state.free_rects.list(), key=rect_area)
 
-  std_items = [it for it in items_subset if is_std_80x120(it)]
-  big_140 = [it for it in items_subset if is_140x120(it)]
+  std_items, big_140 = split_pattern_items(items_subset)
+  pools = build_pattern_pools(std_items, big_140)
 
   # -------------------------
   # PATTERNS (batched by patternId)
   # -------------------------
+  has_big = bool(pools.pairs140p80)
+
   pattern_seq = 0
   for r in rects:
+    # ранний отсев: если паттерн не влезает в rect (или для него нет паллет),
+    # генератор даже не вызываем — он всё равно вернул бы []
+    rect_w = r[1] - r[0]
+    rect_l = r[3] - r[2]
+    can_3across = bool(pools.variants3) and rect_w + 1e-9 >= PATTERN_3ACROSS_W and rect_l + 1e-9 >= PATTERN_3ACROSS_Z
+    can_140p80 = has_big and rect_w + 1e-9 >= PATTERN_140P80_W and rect_l + 1e-9 >= PATTERN_140P80_Z
+    can_3p2 = bool(pools.variants5) and rect_w + 1e-9 >= PATTERN_3P2_W and rect_l + 1e-9 >= PATTERN_3P2_Z
+    can_zigzag = bool(pools.variants5) and rect_w + 1e-9 >= PATTERN_ZIGZAG_W and rect_l + 1e-9 >= PATTERN_ZIGZAG_Z
+    if not (can_3across or can_140p80 or can_3p2 or can_zigzag):
+      continue
+
+    z_cache: Dict[float, List[float]] = {}
+
     # 3across
-    for z0 in _z_anchors_for_len(r, PATTERN_3ACROSS_Z):
-      for pack in gen_3across(r, std_items, z_anchor=z0, pattern_id="scan"):
-        pid = f"p{pattern_seq}"
-        pattern_seq += 1
-        _assign_pattern_id(pack, pid)
-        out.extend(pack)
+    if can_3across:
+      for z0 in _z_anchors_cached(z_cache, r, PATTERN_3ACROSS_Z):
+        for pack in gen_3across(r, pools, z_anchor=z0, pattern_id=None):
+          _assign_pattern_id(pack, pattern_seq)
+          pattern_seq += 1
+          out.extend(pack)
 
     # 140plus80
-    for z0 in _z_anchors_for_len(r, PATTERN_140P80_Z):
-      for pack in gen_140plus80(r, big_140, std_items, z_anchor=z0, pattern_id="scan"):
-        pid = f"p{pattern_seq}"
-        pattern_seq += 1
-        _assign_pattern_id(pack, pid)
-        out.extend(pack)
+    if can_140p80:
+      for z0 in _z_anchors_cached(z_cache, r, PATTERN_140P80_Z):
+        for pack in gen_140plus80(r, pools, z_anchor=z0, pattern_id=None):
+          _assign_pattern_id(pack, pattern_seq)
+          pattern_seq += 1
+          out.extend(pack)
 
     # 3plus2
-    for z0 in _z_anchors_for_len(r, PATTERN_3P2_Z):
-      for pack in gen_3plus2(r, std_items, z_anchor=z0, pattern_id="scan"):
-        pid = f"p{pattern_seq}"
-        pattern_seq += 1
-        _assign_pattern_id(pack, pid)
-        out.extend(pack)
+    if can_3p2:
+      for z0 in _z_anchors_cached(z_cache, r, PATTERN_3P2_Z):
+        for pack in gen_3plus2(r, pools, z_anchor=z0, pattern_id=None):
+          _assign_pattern_id(pack, pattern_seq)
+          pattern_seq += 1
+          out.extend(pack)
 
     # zigzag
-    for z0 in _z_anchors_for_len(r, PATTERN_ZIGZAG_Z):
-      for pack in gen_zigzag(r, std_items, z_anchor=z0, pattern_id="scan"):
-        pid = f"p{pattern_seq}"
-        pattern_seq += 1
-        _assign_pattern_id(pack, pid)
-        out.extend(pack)
+    if can_zigzag:
+      for z0 in _z_anchors_cached(z_cache, r, PATTERN_ZIGZAG_Z):
+        for pack in gen_zigzag(r, pools, z_anchor=z0, pattern_id=None):
+          _assign_pattern_id(pack, pattern_seq)
+          pattern_seq += 1
+          out.extend(pack)
 
   # -------------------------
   # SINGLE (anchor placements)
   # -------------------------
-  for it in items_subset:
-    for rot in (0, 90):
-      dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-      dy = float(it.height)
-
-      for r in rects:
-        minX, maxX, minZ, maxZ = r
-        if (maxX - minX) + 1e-9 < dx:
-          continue
-        if (maxZ - minZ) + 1e-9 < dz:
-          continue
-
-        for (ax, az) in _anchors_for_rect(r, dx, dz):
-          x = ax + dx / 2.0
-          z = az + dz / 2.0
-          y = 0.0
-          aabb = aabb_from_center(x, y + dy / 2.0, z, dx, dy, dz)
-
-          out.append({
-            "itemId": it.id,
-            "x": x, "y": y, "z": z,
-            "rotationY": rot,
-            "dx": dx, "dy": dy, "dz": dz,
-            "aabb": aabb,
-            "kind": "single",
-            "meta": {"rect": r, "anchor": (ax, az)},
-          })
+  out.extend(_single_candidates(rects, items_subset))
 
   return out
@@ -1,7 +1,8 @@
 # candidates/patterns.py
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from domain.types import Candidate, Item
 from geometry.aabb import aabb_from_center
@@ -44,70 +45,162 @@ def _top(items: List[Item], n: int) -> List[Item]:
 
 def is_std_80x120(it: Item, tol: float = 0.03) -> bool:
   w, l = float(it.width), float(it.length)
-  a, b = 0.80, 1.20
+  return (
+    (abs(w - 0.80) <= tol and abs(l - 1.20) <= tol)
+    or (abs(w - 1.20) <= tol and abs(l - 0.80) <= tol)
+  )
 
-  def close(x: float, y: float) -> bool:
-    return abs(x - y) <= tol
 
-  return (close(w, a) and close(l, b)) or (close(w, b) and close(l, a))
+def is_140x120(it: Item, tol: float = 0.03) -> bool:
+  w, l = float(it.width), float(it.length)
+  return (
+    (abs(w - 1.40) <= tol and abs(l - 1.20) <= tol)
+    or (abs(w - 1.20) <= tol and abs(l - 1.40) <= tol)
+  )
 
 
-def is_140x120(it: Item, tol: float = 0.03) -> bool:
+PATTERN_CLASS_TOL = 0.03
+
+
+def _classify_pattern_item(it: Item, tol: float) -> str:
+  # у обоих типов одна сторона 1.20, поэтому сначала находим её,
+  # а вторую сторону сравниваем с 0.80 / 1.40
   w, l = float(it.width), float(it.length)
-  a, b = 1.40, 1.20
+  if abs(l - 1.20) <= tol:
+    other = w
+  elif abs(w - 1.20) <= tol:
+    other = l
+  else:
+    return ""
 
-  def close(x: float, y: float) -> bool:
-    return abs(x - y) <= tol
+  if abs(other - 0.80) <= tol:
+    return "std"
+  if abs(other - 1.40) <= tol:
+    return "big"
+  return ""
 
-  return (close(w, a) and close(l, b)) or (close(w, b) and close(l, a))
 
+def split_pattern_items(items: Iterable[Item], tol: float = PATTERN_CLASS_TOL) -> Tuple[List[Item], List[Item]]:
+  """
+  Один проход вместо is_std_80x120 + is_140x120 по отдельности: (std 80x120, big 140x120).
+  Габариты паллеты не меняются за прогон солвера, поэтому класс при штатном допуске
+  кешируется в it.patternClass и на следующих окнах читается без пересчёта.
+  Порядок паллет сохраняется (он же порядок "жирности").
+  """
+  std: List[Item] = []
+  big: List[Item] = []
+  memo = tol == PATTERN_CLASS_TOL
+  for it in items:
+    cls = it.patternClass if memo else None
+    if cls is None:
+      cls = _classify_pattern_item(it, tol)
+      if memo:
+        it.patternClass = cls
+
+    if cls == "std":
+      std.append(it)
+    elif cls == "big":
+      big.append(it)
+  return std, big
+
+
+# =============================================================================
+# Габариты паллет под слоты паттернов (считаются один раз на вызов генератора)
+# =============================================================================
 
-def _rot_for(it: Item, want_w: float, want_l: float) -> int:
-  # rotationY так, чтобы dx≈want_w, dz≈want_l
-  if abs(float(it.width) - want_w) <= 0.03 and abs(float(it.length) - want_l) <= 0.03:
-    return 0
-  return 90
+@dataclass(frozen=True)
+class SlotFit:
+  rot: int    # rotationY так, чтобы dx≈want_w, dz≈want_l
+  dx: float
+  dz: float
+  ok: bool    # влезает в слот с допуском
+
+
+@dataclass(frozen=True)
+class ItemDims:
+  dy: float
+  s80x120: SlotFit   # слот 0.80 x 1.20 (ряды по 3)
+  s120x80: SlotFit   # слот 1.20 x 0.80 (повернутые ряды по 2)
+  s140x120: SlotFit  # слот 1.40 x 1.20 (big в 140plus80)
+
+
+def _slot_fit(w: float, l: float, want_w: float, want_l: float, max_dx: float, max_dz: float) -> SlotFit:
+  rot = 0 if abs(w - want_w) <= 0.03 and abs(l - want_l) <= 0.03 else 90
+  dx, dz = (w, l) if rot == 0 else (l, w)
+  return SlotFit(rot=rot, dx=dx, dz=dz, ok=(dx <= max_dx and dz <= max_dz))
+
+
+def precompute_item_dims(items: Iterable[Item]) -> Dict[str, ItemDims]:
+  """
+  Таблица itemId -> ItemDims: поворот/габариты/допуск под каждый слот.
+  Не зависит от rect/z_anchor/варианта, поэтому строится один раз на generate_floor_candidates().
+  """
+  out: Dict[str, ItemDims] = {}
+  for it in items:
+    w, l = float(it.width), float(it.length)
+    out[it.id] = ItemDims(
+      dy=float(it.height),
+      s80x120=_slot_fit(w, l, 0.80, 1.20, 0.86, 1.26),
+      s120x80=_slot_fit(w, l, 1.20, 0.80, 1.26, 0.86),
+      s140x120=_slot_fit(w, l, 1.40, 1.20, 1.46, 1.26),
+    )
+  return out
 
 
 # =============================================================================
 # Candidate builder
 # =============================================================================
 
-def _build_candidate(it: Item, x: float, y: float, z: float, rot: int, kind: str, meta: Dict) -> Candidate:
-  dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-  dy = float(it.height)
+def _build_candidate(
+  it: Item,
+  x: float,
+  y: float,
+  z: float,
+  slot: SlotFit,
+  dy: float,
+  kind: str,
+  rect: Rect,
+  pattern_id: Optional[int],
+  meta: Dict,
+) -> Candidate:
+  rot, dx, dz = slot.rot, slot.dx, slot.dz
   aabb = aabb_from_center(x, y + dy / 2.0, z, dx, dy, dz)
 
-  meta2 = dict(meta or {})
-  # Дебаг: позиция паллеты в "жирной" очереди окна (меньше = жирнее).
-  # packer сможет это залогировать, если нужно.
-  # (Если meta2 уже содержит kRank — не трогаем.)
-  meta2.setdefault("kRank", None)
-
-  return {
-    "itemId": it.id,
-    "x": x, "y": y, "z": z,
-    "rotationY": rot,
-    "dx": dx, "dy": dy, "dz": dz,
-    "aabb": aabb,
-    "kind": kind,
-    "meta": meta2,
-  }
+  # meta берём как есть, без копии: вызывающий собирает свежий dict на каждую паллету
+  # и обязан положить туда kRank — позицию паллеты в "жирной" очереди окна
+  # (меньше = жирнее), packer сможет это залогировать, если нужно.
+  return Candidate(
+    itemId=it.id,
+    x=x, y=y, z=z,
+    rotationY=rot,
+    dx=dx, dy=dy, dz=dz,
+    aabb=aabb,
+    kind=kind,
+    rect=rect,
+    meta=meta,
+    patternId=pattern_id,
+  )
 
 
 # =============================================================================
 # Варианты наборов "по жирности" без комбинаторики
 # =============================================================================
 
-def _variants_take3(items: List[Item]) -> List[Tuple[Item, Item, Item]]:
-  """
-  Возвращает несколько трио, начиная с самых "жирных" (по порядку списка).
-  Без комбинаторного взрыва.
-  """
-  n = len(items)
-  if n < 3:
-    return []
+def _dedup_idx_sets(idx_sets: List[Tuple[int, ...]], cap: int) -> Tuple[Tuple[int, ...], ...]:
+  out: List[Tuple[int, ...]] = []
+  seen = set()
+  for idxs in idx_sets:
+    key = tuple(sorted(idxs))
+    if key in seen:
+      continue
+    seen.add(key)
+    out.append(idxs)
+    if len(out) >= cap:
+      break
+  return tuple(out)
 
+
+def _build_take3_idx(n: int) -> Tuple[Tuple[int, ...], ...]:
   # базовый: 0,1,2
   idx_sets = [(0, 1, 2)]
 
@@ -121,29 +214,10 @@ def _variants_take3(items: List[Item]) -> List[Tuple[Item, Item, Item]]:
     idx_sets.append((0, 1, 4))
     idx_sets.append((0, 2, 4))
 
-  out: List[Tuple[Item, Item, Item]] = []
-  seen = set()
-  for a, b, c in idx_sets:
-    if a < n and b < n and c < n:
-      key = tuple(sorted((a, b, c)))
-      if key in seen:
-        continue
-      seen.add(key)
-      out.append((items[a], items[b], items[c]))
-    if len(out) >= MAX_VARIANTS_3:
-      break
-  return out
-
+  return _dedup_idx_sets(idx_sets, MAX_VARIANTS_3)
 
-def _variants_take5(items: List[Item]) -> List[Tuple[Item, Item, Item, Item, Item]]:
-  """
-  Несколько пятёрок, начиная с самых "жирных".
-  Идея: базово берём топ-5, далее меняем 5-ю позицию и/или одну из середины.
-  """
-  n = len(items)
-  if n < 5:
-    return []
 
+def _build_take5_idx(n: int) -> Tuple[Tuple[int, ...], ...]:
   idx_sets = [
     (0, 1, 2, 3, 4),
   ]
@@ -160,18 +234,85 @@ def _variants_take5(items: List[Item]) -> List[Tuple[Item, Item, Item, Item, Ite
     idx_sets.append((0, 1, 2, 3, 6))
     idx_sets.append((0, 1, 2, 4, 6))
 
-  out: List[Tuple[Item, Item, Item, Item, Item]] = []
-  seen = set()
-  for idxs in idx_sets:
-    if all(i < n for i in idxs):
-      key = tuple(sorted(idxs))
-      if key in seen:
-        continue
-      seen.add(key)
-      out.append(tuple(items[i] for i in idxs))  # type: ignore
-    if len(out) >= MAX_VARIANTS_5:
-      break
-  return out
+  return _dedup_idx_sets(idx_sets, MAX_VARIANTS_5)
+
+
+# Наборы индексов зависят только от размера пула (и дальше 5/7 не растут),
+# поэтому считаются один раз при импорте
+_TAKE3_IDX = {n: _build_take3_idx(n) for n in (3, 4, 5)}
+_TAKE5_IDX = {n: _build_take5_idx(n) for n in (5, 6, 7)}
+
+
+def _variants_take3(items: List[Item]) -> Tuple[Tuple[int, ...], ...]:
+  """
+  Возвращает несколько трио (индексы в items), начиная с самых "жирных" (по порядку списка).
+  Без комбинаторного взрыва.
+  """
+  n = len(items)
+  if n < 3:
+    return ()
+  return _TAKE3_IDX[min(n, 5)]
+
+
+def _variants_take5(items: List[Item]) -> Tuple[Tuple[int, ...], ...]:
+  """
+  Несколько пятёрок (индексы в items), начиная с самых "жирных".
+  Идея: базово берём топ-5, далее меняем 5-ю позицию и/или одну из середины.
+  """
+  n = len(items)
+  if n < 5:
+    return ()
+  return _TAKE5_IDX[min(n, 7)]
+
+
+@dataclass(frozen=True)
+class PatternPools:
+  """
+  Пулы "жирных" паллет и варианты наборов из них.
+  Не зависят от rect/z_anchor, поэтому строятся один раз на generate_floor_candidates().
+  Варианты и пары хранят ИНДЕКСЫ в пулах; габариты лежат в std_dims/big_dims
+  по тем же индексам, так что генераторы не ходят в Item и в словарь dims.
+  """
+  std_pool: List[Item]
+  big_pool: List[Item]
+  std_dims: List[ItemDims]
+  big_dims: List[ItemDims]
+  variants3: Tuple[Tuple[int, ...], ...]
+  variants5: Tuple[Tuple[int, ...], ...]
+  # пары (bi_idx, si_idx, ширина пары по X) для 140plus80,
+  # только из паллет, встающих в свои слоты; порядок — big-major, как в двойном цикле
+  pairs140p80: List[Tuple[int, int, float]]
+
+
+def _pairs_140plus80(big_dims: List[ItemDims], std_dims: List[ItemDims]) -> List[Tuple[int, int, float]]:
+  # фильтр по слотам не зависит от rect: отбрасываем неподходящие паллеты один раз,
+  # а внутри rect остаётся только сравнение ширины пары с rect_w
+  bigs = [(bi_idx, d.s140x120.dx) for bi_idx, d in enumerate(big_dims) if d.s140x120.ok]
+  stds = [(si_idx, d.s80x120.dx) for si_idx, d in enumerate(std_dims) if d.s80x120.ok]
+  return [
+    (bi_idx, si_idx, dx_b + dx_s)
+    for bi_idx, dx_b in bigs
+    for si_idx, dx_s in stds
+  ]
+
+
+def build_pattern_pools(std_items: List[Item], big_items: List[Item]) -> PatternPools:
+  # std_items/big_items уже отсортированы по "жирности" через очередь -> window
+  std_pool = _top(std_items, MAX_PREFIX_STD)
+  big_pool = _top(big_items, MAX_PREFIX_BIG)
+  # габариты нужны только паллетам из пулов, а не всему окну
+  dims = precompute_item_dims(std_pool + big_pool)
+  std_dims = [dims[it.id] for it in std_pool]
+  big_dims = [dims[it.id] for it in big_pool]
+  return PatternPools(
+    std_pool=std_pool,
+    big_pool=big_pool,
+    std_dims=std_dims,
+    big_dims=big_dims,
+    variants3=_variants_take3(std_pool),
+    variants5=_variants_take5(std_pool),
+    pairs140p80=_pairs_140plus80(big_dims, std_dims),
+  )
 
 
 # -------------------------------------------------------------------------
@@ -182,7 +323,13 @@ PATTERN_3ACROSS_W = 2.40
 PATTERN_3ACROSS_Z = 1.20
 
 
-def gen_3across(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id: str) -> List[List[Candidate]]:
+def gen_3across(
+  rect: Rect,
+  pools: PatternPools,
+  *,
+  z_anchor: float,
+  pattern_id: Optional[int],
+) -> List[List[Candidate]]:
   minX, maxX, minZ, maxZ = rect
   rect_w = maxX - minX
   rect_l = maxZ - minZ
@@ -190,31 +337,32 @@ def gen_3across(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_i
   if rect_w + 1e-9 < PATTERN_3ACROSS_W or rect_l + 1e-9 < PATTERN_3ACROSS_Z:
     return []
 
-  # std_items уже отсортирован по "жирности" через очередь -> window
-  pool = _top(list(std_items), MAX_PREFIX_STD)
-  if len(pool) < 3:
+  if not pools.variants3:
     return []
 
   z0 = z_anchor
   zc = z0 + PATTERN_3ACROSS_Z / 2.0
   y = 0.0
 
+  std_pool = pools.std_pool
+  std_dims = pools.std_dims
   out: List[List[Candidate]] = []
 
-  for trio in _variants_take3(pool):
+  for trio in pools.variants3:
     pack: List[Candidate] = []
     ok = True
 
-    for j, it in enumerate(trio):
-      rot = _rot_for(it, 0.80, 1.20)
-      dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-      if dx > 0.86 or dz > 1.26:
+    for j, i in enumerate(trio):
+      it = std_pool[i]
+      d = std_dims[i]
+      slot = d.s80x120
+      if not slot.ok:
         ok = False
         break
 
-      x = minX + (j * 0.80) + dx / 2.0
-      meta = {"pattern": "3across", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "idx": j, "kRank": j}
-      pack.append(_build_candidate(it, x, y, zc, rot, "pattern_3across", meta))
+      x = minX + (j * 0.80) + slot.dx / 2.0
+      meta = {"pattern": "3across", "slotZ0": z0, "idx": j, "kRank": j}
+      pack.append(_build_candidate(it, x, y, zc, slot, d.dy, "pattern_3across", rect, pattern_id, meta))
 
     if ok:
       out.append(pack)
@@ -233,11 +381,10 @@ PATTERN_140P80_Z = 1.20
 
 def gen_140plus80(
   rect: Rect,
-  big_items: List[Item],
-  std_items: List[Item],
+  pools: PatternPools,
   *,
   z_anchor: float,
-  pattern_id: str
+  pattern_id: Optional[int],
 ) -> List[List[Candidate]]:
   minX, maxX, minZ, maxZ = rect
   rect_w = maxX - minX
@@ -246,50 +393,51 @@ def gen_140plus80(
   if rect_w + 1e-9 < PATTERN_140P80_W or rect_l + 1e-9 < PATTERN_140P80_Z:
     return []
 
-  big_pool = _top(list(big_items), MAX_PREFIX_BIG)
-  std_pool = _top(list(std_items), MAX_PREFIX_STD)
-  if not big_pool or not std_pool:
+  pairs = pools.pairs140p80
+  if not pairs:
     return []
 
+  big_pool, big_dims = pools.big_pool, pools.big_dims
+  std_pool, std_dims = pools.std_pool, pools.std_dims
+
   z0 = z_anchor
   zc = z0 + PATTERN_140P80_Z / 2.0
   y = 0.0
+  max_w = rect_w + 1e-9
 
   out: List[List[Candidate]] = []
   produced = 0
 
   # Внутри паттерна: пробуем самые жирные первые, но даём небольшой fallback.
-  # 1) фиксируем биг как можно жирнее
-  for bi_idx, bi in enumerate(big_pool):
-    rot_b = _rot_for(bi, 1.40, 1.20)
-    dx_b, dz_b = (float(bi.width), float(bi.length)) if rot_b == 0 else (float(bi.length), float(bi.width))
-    if dx_b > 1.46 or dz_b > 1.26:
+  # Пары уже отфильтрованы по слотам и идут в порядке (биг жирнее -> std жирнее),
+  # здесь остаётся только проверка ширины пары против rect.
+  for bi_idx, si_idx, pair_w in pairs:
+    if pair_w > max_w:
       continue
 
-    # 2) к нему подбираем std как можно жирнее
-    for si_idx, si in enumerate(std_pool):
-      rot_s = _rot_for(si, 0.80, 1.20)
-      dx_s, dz_s = (float(si.width), float(si.length)) if rot_s == 0 else (float(si.length), float(si.width))
-      if dx_s > 0.86 or dz_s > 1.26:
-        continue
-
-      if (dx_b + dx_s) > rect_w + 1e-9:
-        continue
+    bi = big_pool[bi_idx]
+    si = std_pool[si_idx]
+    d_b = big_dims[bi_idx]
+    d_s = std_dims[si_idx]
+    slot_b = d_b.s140x120
+    slot_s = d_s.s80x120
+    dx_b = slot_b.dx
+    dx_s = slot_s.dx
 
-      xb = minX + dx_b / 2.0
-      xs = minX + dx_b + dx_s / 2.0
+    xb = minX + dx_b / 2.0
+    xs = minX + dx_b + dx_s / 2.0
 
-      meta_b = {"pattern": "140plus80", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "role": "big", "kRank": bi_idx}
-      meta_s = {"pattern": "140plus80", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "role": "std", "kRank": si_idx}
+    meta_b = {"pattern": "140plus80", "slotZ0": z0, "role": "big", "kRank": bi_idx}
+    meta_s = {"pattern": "140plus80", "slotZ0": z0, "role": "std", "kRank": si_idx}
 
-      out.append([
-        _build_candidate(bi, xb, y, zc, rot_b, "pattern_140plus80", meta_b),
-        _build_candidate(si, xs, y, zc, rot_s, "pattern_140plus80", meta_s),
-      ])
+    out.append([
+      _build_candidate(bi, xb, y, zc, slot_b, d_b.dy, "pattern_140plus80", rect, pattern_id, meta_b),
+      _build_candidate(si, xs, y, zc, slot_s, d_s.dy, "pattern_140plus80", rect, pattern_id, meta_s),
+    ])
 
-      produced += 1
-      if produced >= MAX_VARIANTS_140P80:
-        return out
+    produced += 1
+    if produced >= MAX_VARIANTS_140P80:
+      return out
 
   return out
 
@@ -305,7 +453,13 @@ PATTERN_3P2_W = 2.40
 PATTERN_3P2_Z = 2.00
 
 
-def gen_3plus2(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id: str) -> List[List[Candidate]]:
+def gen_3plus2(
+  rect: Rect,
+  pools: PatternPools,
+  *,
+  z_anchor: float,
+  pattern_id: Optional[int],
+) -> List[List[Candidate]]:
   minX, maxX, minZ, maxZ = rect
   rect_w = maxX - minX
   rect_l = maxZ - minZ
@@ -313,8 +467,7 @@ def gen_3plus2(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id
   if rect_w + 1e-9 < PATTERN_3P2_W or rect_l + 1e-9 < PATTERN_3P2_Z:
     return []
 
-  pool = _top(list(std_items), MAX_PREFIX_STD)
-  if len(pool) < 5:
+  if not pools.variants5:
     return []
 
   z0 = z_anchor
@@ -324,9 +477,11 @@ def gen_3plus2(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id
   zc2 = z1 + 0.80 / 2.0
 
   y = 0.0
+  std_pool = pools.std_pool
+  std_dims = pools.std_dims
   out: List[List[Candidate]] = []
 
-  for five in _variants_take5(pool):
+  for five in pools.variants5:
     row1 = five[:3]
     row2 = five[3:]
 
@@ -334,28 +489,30 @@ def gen_3plus2(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id
     ok = True
 
     # Row1: 3 across (0.80x1.20)
-    for j, it in enumerate(row1):
-      rot = _rot_for(it, 0.80, 1.20)
-      dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-      if dx > 0.86 or dz > 1.26:
+    for j, i in enumerate(row1):
+      it = std_pool[i]
+      d = std_dims[i]
+      slot = d.s80x120
+      if not slot.ok:
         ok = False
         break
-      x = minX + (j * 0.80) + dx / 2.0
-      meta = {"pattern": "3plus2", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "row": 1, "idx": j, "kRank": j}
-      pack.append(_build_candidate(it, x, y, zc1, rot, "pattern_3plus2", meta))
+      x = minX + (j * 0.80) + slot.dx / 2.0
+      meta = {"pattern": "3plus2", "slotZ0": z0, "row": 1, "idx": j, "kRank": j}
+      pack.append(_build_candidate(it, x, y, zc1, slot, d.dy, "pattern_3plus2", rect, pattern_id, meta))
     if not ok:
       continue
 
     # Row2: 2 across rotated (1.20x0.80)
-    for j, it in enumerate(row2):
-      rot = _rot_for(it, 1.20, 0.80)
-      dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-      if dx > 1.26 or dz > 0.86:
+    for j, i in enumerate(row2):
+      it = std_pool[i]
+      d = std_dims[i]
+      slot = d.s120x80
+      if not slot.ok:
         ok = False
         break
-      x = minX + (j * 1.20) + dx / 2.0
-      meta = {"pattern": "3plus2", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "row": 2, "idx": j, "kRank": 3 + j}
-      pack.append(_build_candidate(it, x, y, zc2, rot, "pattern_3plus2", meta))
+      x = minX + (j * 1.20) + slot.dx / 2.0
+      meta = {"pattern": "3plus2", "slotZ0": z0, "row": 2, "idx": j, "kRank": 3 + j}
+      pack.append(_build_candidate(it, x, y, zc2, slot, d.dy, "pattern_3plus2", rect, pattern_id, meta))
 
     if ok:
       out.append(pack)
@@ -374,7 +531,13 @@ PATTERN_ZIGZAG_W = 2.40
 PATTERN_ZIGZAG_Z = 2.00
 
 
-def gen_zigzag(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id: str) -> List[List[Candidate]]:
+def gen_zigzag(
+  rect: Rect,
+  pools: PatternPools,
+  *,
+  z_anchor: float,
+  pattern_id: Optional[int],
+) -> List[List[Candidate]]:
   minX, maxX, minZ, maxZ = rect
   rect_w = maxX - minX
   rect_l = maxZ - minZ
@@ -382,8 +545,7 @@ def gen_zigzag(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id
   if rect_w + 1e-9 < PATTERN_ZIGZAG_W or rect_l + 1e-9 < PATTERN_ZIGZAG_Z:
     return []
 
-  pool = _top(list(std_items), MAX_PREFIX_STD)
-  if len(pool) < 5:
+  if not pools.variants5:
     return []
 
   z0 = z_anchor
@@ -393,9 +555,11 @@ def gen_zigzag(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id
   zc2 = z1 + 1.20 / 2.0
 
   y = 0.0
+  std_pool = pools.std_pool
+  std_dims = pools.std_dims
   out: List[List[Candidate]] = []
 
-  for five in _variants_take5(pool):
+  for five in pools.variants5:
     row1 = five[:2]
     row2 = five[2:]
 
@@ -403,28 +567,30 @@ def gen_zigzag(rect: Rect, std_items: List[Item], *, z_anchor: float, pattern_id
     ok = True
 
     # Row1: 2 across rotated (1.20x0.80)
-    for j, it in enumerate(row1):
-      rot = _rot_for(it, 1.20, 0.80)
-      dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-      if dx > 1.26 or dz > 0.86:
+    for j, i in enumerate(row1):
+      it = std_pool[i]
+      d = std_dims[i]
+      slot = d.s120x80
+      if not slot.ok:
         ok = False
         break
-      x = minX + (j * 1.20) + dx / 2.0
-      meta = {"pattern": "zigzag", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "row": 1, "idx": j, "kRank": j}
-      pack.append(_build_candidate(it, x, y, zc1, rot, "pattern_zigzag", meta))
+      x = minX + (j * 1.20) + slot.dx / 2.0
+      meta = {"pattern": "zigzag", "slotZ0": z0, "row": 1, "idx": j, "kRank": j}
+      pack.append(_build_candidate(it, x, y, zc1, slot, d.dy, "pattern_zigzag", rect, pattern_id, meta))
     if not ok:
       continue
 
     # Row2: 3 across normal (0.80x1.20)
-    for j, it in enumerate(row2):
-      rot = _rot_for(it, 0.80, 1.20)
-      dx, dz = (float(it.width), float(it.length)) if rot == 0 else (float(it.length), float(it.width))
-      if dx > 0.86 or dz > 1.26:
+    for j, i in enumerate(row2):
+      it = std_pool[i]
+      d = std_dims[i]
+      slot = d.s80x120
+      if not slot.ok:
         ok = False
         break
-      x = minX + (j * 0.80) + dx / 2.0
-      meta = {"pattern": "zigzag", "patternId": pattern_id, "rect": rect, "slotZ0": z0, "row": 2, "idx": j, "kRank": 2 + j}
-      pack.append(_build_candidate(it, x, y, zc2, rot, "pattern_zigzag", meta))
+      x = minX + (j * 0.80) + slot.dx / 2.0
+      meta = {"pattern": "zigzag", "slotZ0": z0, "row": 2, "idx": j, "kRank": 2 + j}
+      pack.append(_build_candidate(it, x, y, zc2, slot, d.dy, "pattern_zigzag", rect, pattern_id, meta))
 
     if ok:
       out.append(pack)
@@ -15,7 +15,7 @@ def from_item_at_pose(item: Item, x: float, y: float, z: float, rotationY: int)
   dy = float(item.height)
 
   aabb = aabb_from_center(x, y + dy / 2.0, z, dx, dy, dz)
-  corner: Dict[str, float] = {"x": aabb["minX"], "z": aabb["minZ"]}
+  corner: Dict[str, float] = {"x": aabb.minX, "z": aabb.minZ}
 
   return PlacedItem(
     item=item,
@@ -29,13 +29,13 @@ def from_item_at_pose(item: Item, x: float, y: float, z: float, rotationY: int)
 
 
 def placed_from_candidate(candidate: Candidate, item: Item) -> PlacedItem:
-  aabb = candidate["aabb"]
-  corner: Dict[str, float] = {"x": aabb["minX"], "z": aabb["minZ"]}
+  aabb = candidate.aabb
+  corner: Dict[str, float] = {"x": aabb.minX, "z": aabb.minZ}
   return PlacedItem(
     item=item,
-    x=float(candidate["x"]), y=float(candidate["y"]), z=float(candidate["z"]),
-    rotationY=int(candidate["rotationY"]),
-    dims=(float(candidate["dx"]), float(candidate["dy"]), float(candidate["dz"])),
+    x=float(candidate.x), y=float(candidate.y), z=float(candidate.z),
+    rotationY=int(candidate.rotationY),
+    dims=(float(candidate.dx), float(candidate.dy), float(candidate.dz)),
     aabb=aabb,
     corner=corner,
     status=item.status,
@@ -2,13 +2,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
-from domain.types import AxleLoads, Candidate, DebugEvent, Item, ModeDecision, PlanResult, PlacedItem, Vehicle
+from domain.types import AABB, AxleLoads, Candidate, DebugEvent, Item, ModeDecision, PlanResult, PlacedItem, Vehicle
+from geometry.aabb import aabb_union
 from geometry.free_rects import FreeRects, Rect
+from geometry.spatial_hash import SpatialHash
 from catalogs.placed_item import placed_from_candidate
 from constraints.bounds import check_collision, check_oob
-from constraints.axles import compute_loads, check_loads
+from constraints.axles import AxleParams, axle_params, compute_loads_delta, check_loads
 
 
 @dataclass
@@ -18,18 +20,56 @@ class PlanState:
   vehicle: Vehicle
   mode: ModeDecision
   debug: List[DebugEvent] = field(default_factory=list)
+  # False => emit() ничего не копит (и payload-ы в PlanResult.debug не попадают)
+  debug_enabled: bool = True
 
   items_by_id: Dict[str, Item] = field(default_factory=dict)
+  # K по id паллеты для score_candidate (scoring.coeff.precompute_k)
+  k_by_id: Dict[str, float] = field(default_factory=dict, repr=False)
   placed: List[PlacedItem] = field(default_factory=list)
   unplaced: List[Item] = field(default_factory=list)
 
   free_rects: FreeRects = field(default_factory=lambda: FreeRects(rects=[]))
   loads: Optional[AxleLoads] = None
 
+  # SoA по placed для осевой модели: вес и центр по Z, в порядке постановки
+  placed_weights: List[float] = field(default_factory=list, repr=False)
+  placed_zs: List[float] = field(default_factory=list, repr=False)
+  # broadphase-сетка по AABB из placed (для check_collision)
+  placed_index: SpatialHash = field(default_factory=SpatialHash, repr=False)
+  # общий bbox всего placed (None — кузов пуст): дешёвый префильтр коллизий группы
+  placed_union: Optional[AABB] = field(default=None, repr=False)
+
+  # осевая модель машины во float, один раз на план
+  axles: AxleParams = field(init=False, repr=False)
+  # False => check_loads() ничего не может отклонить (нет payloadMaxKg и осевой модели):
+  # кандидатов по нагрузкам не проверяем, loads считаются только на commit() для отчёта
+  loads_limited: bool = field(init=False, repr=False)
+  # (half_w, half_l, inner_h) кузова для inline-OOB в can_place_fast()
+  oob_bounds: Tuple[float, float, float] = field(init=False, repr=False)
+
+  def __post_init__(self) -> None:
+    self.axles = axle_params(self.vehicle)
+    self.loads_limited = self.axles.limited
+    self.oob_bounds = (
+      float(self.vehicle["innerWidth"]) / 2.0,
+      float(self.vehicle["innerLength"]) / 2.0,
+      float(self.vehicle["innerHeight"]),
+    )
+
   def init_free_rects(self) -> None:
     self.free_rects = FreeRects.init_for_vehicle(self.vehicle)
 
-  def emit(self, evt: str, payload: dict) -> None:
+  def emit(self, evt: str, payload: Union[dict, Callable[[], dict]]) -> None:
+    """
+    payload — dict или функция без аргументов, которая его строит: при выключенном debug
+    функция не вызывается вовсе. Вызов — сразу, а не при snapshot(): замыкания из packer
+    смотрят на переменные цикла, которые к концу плана уже другие.
+    """
+    if not self.debug_enabled:
+      return
+    if callable(payload):
+      payload = payload()
     self.debug.append(DebugEvent(evt=evt, payload=payload))
 
   def can_place(self, cand: Candidate) -> Tuple[bool, List[str]]:
@@ -40,31 +80,67 @@ class PlanState:
       reasons.extend(r)
       return (False, reasons)
 
-    ok, r = check_collision(cand, self.placed)
+    ok, r = check_collision(cand, self.placed_index)
     if not ok:
       reasons.extend(r)
       return (False, reasons)
 
     # Axles hard-filter
-    item = self.items_by_id[cand["itemId"]]
-    tmp_placed = self.placed + [placed_from_candidate(cand, item=item)]
-    loads = compute_loads(tmp_placed, self.vehicle)
-    ok, r = check_loads(loads, self.vehicle)
+    if not self.loads_limited:
+      return (True, [])
+
+    # self.loads — итог по уже стоящим паллетам, досуммируем только кандидата
+    item = self.items_by_id[cand.itemId]
+    loads = compute_loads_delta(self.loads, (float(item.weight),), (float(cand.z),), self.vehicle, self.axles)
+    ok, r = check_loads(loads, self.vehicle, self.axles)
     if not ok:
       reasons.extend(r)
       return (False, reasons)
 
     return (True, [])
 
+  def can_place_fast(self, cand: Candidate) -> bool:
+    """
+    То же решение, что can_place(), но только bool: для ранжирования кандидатов,
+    где reasons не нужны. OOB считается inline по кешированным границам кузова,
+    коллизии — по сетке placed_index, оси — O(1) дельтой от self.loads;
+    без промежуточных (ok, reasons) и списков.
+    """
+    aabb = cand.aabb
+    minX, maxX, minY, maxY, minZ, maxZ = aabb
+    half_w, half_l, inner_h = self.oob_bounds
+    eps = 1e-9
+    if minX < -half_w - eps or maxX > half_w + eps:
+      return False
+    if minZ < -half_l - eps or maxZ > half_l + eps:
+      return False
+    if minY < 0.0 - eps or maxY > inner_h + eps:
+      return False
+
+    if self.placed_index.collides(aabb):
+      return False
+
+    if not self.loads_limited:
+      return True
+
+    item = self.items_by_id[cand.itemId]
+    loads = compute_loads_delta(self.loads, (float(item.weight),), (float(cand.z),), self.vehicle, self.axles)
+    ok, _ = check_loads(loads, self.vehicle, self.axles)
+    return ok
+
   def commit(self, cand: Candidate) -> None:
-    item = self.items_by_id[cand["itemId"]]
+    item = self.items_by_id[cand.itemId]
     p = placed_from_candidate(cand, item=item)
     self.placed.append(p)
+    self.placed_weights.append(float(item.weight))
+    self.placed_zs.append(float(cand.z))
+    self.placed_index.insert(p.aabb)
+    self.placed_union = p.aabb if self.placed_union is None else aabb_union(self.placed_union, p.aabb)
 
-    used: Rect = (cand["aabb"]["minX"], cand["aabb"]["maxX"], cand["aabb"]["minZ"], cand["aabb"]["maxZ"])
+    used: Rect = (cand.aabb.minX, cand.aabb.maxX, cand.aabb.minZ, cand.aabb.maxZ)
     self.free_rects.reserve(used)
 
-    self.loads = compute_loads(self.placed, self.vehicle)
+    self.loads = compute_loads_delta(self.loads, (self.placed_weights[-1],), (self.placed_zs[-1],), self.vehicle, self.axles)
 
   def snapshot(self) -> PlanResult:
     return PlanResult(
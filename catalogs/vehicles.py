@@ -1,19 +1,72 @@
-from typing import Dict, Optional
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
 from domain.types import Vehicle
+from settings import SETTINGS
 
+# пресеты неизменяемые (MappingProxyType): get_vehicle() отдаёт их без копии
 VEHICLE_PRESETS: Dict[str, Vehicle] = {
-  "Тент (20т)": {"innerWidth": 2.45, "innerHeight": 2.70, "innerLength": 13.60},
-  "Тент (10т)": {"innerWidth": 2.45, "innerHeight": 2.70, "innerLength": 6.80},
-  "Контейнер 40'' HC": {"innerWidth": 2.35, "innerHeight": 2.39, "innerLength": 12.02},
+  "Тент (20т)": MappingProxyType({"innerWidth": 2.45, "innerHeight": 2.70, "innerLength": 13.60}),
+  "Тент (10т)": MappingProxyType({"innerWidth": 2.45, "innerHeight": 2.70, "innerLength": 6.80}),
+  "Контейнер 40'' HC": MappingProxyType({"innerWidth": 2.35, "innerHeight": 2.39, "innerLength": 12.02}),
 }
 
-DEFAULT_VEHICLE: Vehicle = {"innerWidth": 2.45, "innerHeight": 2.70, "innerLength": 13.60}
+DEFAULT_VEHICLE: Vehicle = MappingProxyType({"innerWidth": 2.45, "innerHeight": 2.70, "innerLength": 13.60})
 
 
 def get_vehicle(transport_type: Optional[str]) -> Vehicle:
+  """
+  Возвращает общий read-only пресет (MappingProxyType) без копирования:
+  солвер машину только читает. Если нужно менять — dict(get_vehicle(...)).
+  """
   if not transport_type:
-    return dict(DEFAULT_VEHICLE)
+    return DEFAULT_VEHICLE
   v = VEHICLE_PRESETS.get(str(transport_type))
   if not v:
-    return dict(DEFAULT_VEHICLE)
-  return dict(v)
\ No newline at end of file
+    return DEFAULT_VEHICLE
+  return v
+
+# ----------------------------
+# Ёмкости кузова (float), общие для detect_mode и utilization
+# ----------------------------
+@dataclass(frozen=True)
+class VehicleCapacity:
+  floor_area_m2: float  # innerWidth * innerLength
+  volume_m3: float  # floor_area_m2 * innerHeight
+  fill_floor: float
+  fill_volume: float
+  floor_capacity_m2: float  # floor_area_m2 * fill_floor
+  vol_capacity_m3: float  # volume_m3 * fill_volume
+
+
+def _build_capacity(vehicle: Vehicle) -> VehicleCapacity:
+  floor_area = float(vehicle["innerWidth"]) * float(vehicle["innerLength"])
+  volume = floor_area * float(vehicle["innerHeight"])
+  fill_floor = float(vehicle.get("fillFactorFloor", SETTINGS.FILL_FACTOR_FLOOR_DEFAULT))
+  fill_volume = float(vehicle.get("fillFactorVolume", SETTINGS.FILL_FACTOR_VOLUME_DEFAULT))
+  return VehicleCapacity(
+    floor_area_m2=floor_area,
+    volume_m3=volume,
+    fill_floor=fill_floor,
+    fill_volume=fill_volume,
+    floor_capacity_m2=floor_area * fill_floor,
+    vol_capacity_m3=volume * fill_volume,
+  )
+
+
+# для пресетов ёмкости считаются один раз при импорте; ключ — id пресета,
+# сам пресет хранится рядом, чтобы сверить identity (id чужого dict-а может совпасть только с мёртвым объектом)
+_PRESET_CAPACITY: Dict[int, Tuple[Vehicle, VehicleCapacity]] = {
+  id(v): (v, _build_capacity(v)) for v in (*VEHICLE_PRESETS.values(), DEFAULT_VEHICLE)
+}
+
+
+def vehicle_capacity(vehicle: Vehicle) -> VehicleCapacity:
+  """
+  Площадь/объём кузова и ёмкости с fill factor во float.
+  Для пресетов из get_vehicle() — готовый объект, для прочих машин — считается на вызов.
+  """
+  hit = _PRESET_CAPACITY.get(id(vehicle))
+  if hit is not None and hit[0] is vehicle:
+    return hit[1]
+  return _build_capacity(vehicle)
@@ -1,42 +1,121 @@
 # constraints/axles.py
 from __future__ import annotations
 
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
 
 from domain.types import AxleLoads, Candidate, PlacedItem, Vehicle
-from catalogs.placed_item import placed_from_candidate
+
+# причины отказа check_loads (packer раскладывает их по бакетам через set, а не по подстрокам)
+REASON_PAYLOAD = "payload_limit"
+REASON_AXLE_A = "axleA_limit"
+REASON_AXLE_B = "axleB_limit"
+
+
+@dataclass(frozen=True)
+class AxleParams:
+  """
+  Параметры осевой модели машины, приведённые к float один раз на план:
+  compute_loads_delta/check_loads вызываются на каждого кандидата,
+  и без этого каждый раз делали бы vehicle.get() + float() по всем полям.
+  """
+  has_axles: bool
+  a_pos: float   # ось A от головы, м (0.0, если осевой модели нет)
+  span: float    # b_pos - a_pos
+  z0: float      # -L/2: z центра -> x_from_head
+  payload_max: Optional[float]
+  a_lim: Optional[float]
+  b_lim: Optional[float]
+
+  @property
+  def limited(self) -> bool:
+    """
+    Может ли check_loads() вообще что-то отклонить для этой машины.
+    Без payloadMaxKg и без осевой модели (у всех VEHICLE_PRESETS её нет) нагрузки
+    только считаются для отчёта, а проверку кандидатов можно пропускать целиком.
+    """
+    if self.payload_max is not None:
+      return True
+    # без осевой модели нагрузки на оси = 0, лимит осей сработать не может
+    if not self.has_axles:
+      return False
+    return self.a_lim is not None or self.b_lim is not None
+
+
+def _opt_float(v) -> Optional[float]:
+  return None if v is None else float(v)
+
+
+def axle_params(vehicle: Vehicle) -> AxleParams:
+  a_pos = vehicle.get("axleAPosFromHeadM")
+  b_pos = vehicle.get("axleBPosFromHeadM")
+  has_axles = a_pos is not None and b_pos is not None and abs(float(b_pos) - float(a_pos)) >= 1e-9
+  return AxleParams(
+    has_axles=has_axles,
+    a_pos=float(a_pos) if has_axles else 0.0,
+    span=(float(b_pos) - float(a_pos)) if has_axles else 0.0,
+    z0=-float(vehicle["innerLength"]) / 2.0,
+    payload_max=_opt_float(vehicle.get("payloadMaxKg")),
+    a_lim=_opt_float(vehicle.get("axleALimitKg")),
+    b_lim=_opt_float(vehicle.get("axleBLimitKg")),
+  )
 
 
 def compute_loads(placed: List[PlacedItem], vehicle: Vehicle) -> AxleLoads:
-  total = 0.0
-  for p in placed:
-    total += float(p.item.weight)
+  return compute_loads_soa(
+    [float(p.item.weight) for p in placed],
+    [float(p.z) for p in placed],
+    vehicle,
+  )
 
-  loads: AxleLoads = {"payload_kg": total}
 
-  a_pos = vehicle.get("axleAPosFromHeadM")
-  b_pos = vehicle.get("axleBPosFromHeadM")
-  a_lim = vehicle.get("axleALimitKg")
-  b_lim = vehicle.get("axleBLimitKg")
+def compute_loads_soa(weights: Sequence[float], zs: Sequence[float], vehicle: Vehicle) -> AxleLoads:
+  """
+  То же, что compute_loads, но по параллельным спискам вес/центр по Z (float),
+  без обхода PlacedItem: PlanState держит эти списки и дописывает их на commit().
+  """
+  return compute_loads_delta(None, weights, zs, vehicle)
+
+
+def compute_loads_delta(
+  base: Optional[AxleLoads],
+  weights: Sequence[float],
+  zs: Sequence[float],
+  vehicle: Vehicle,
+  params: Optional[AxleParams] = None,
+) -> AxleLoads:
+  """
+  Нагрузки после добавления паллет (weights/zs) к уже посчитанным base.
+  payload и реакции осей линейны по (вес, z), поэтому достаточно досуммировать
+  вклад новых паллет к итогам base — O(добавленных), а не O(всех placed).
+  Порядок сложения тот же, что у полного пересчёта, так что результат совпадает бит-в-бит.
+  base=None — пустой кузов. params — axle_params(vehicle), если уже посчитаны (PlanState.axles).
+  """
+  p = params if params is not None else axle_params(vehicle)
+
+  total = float(base.get("payload_kg", 0.0)) if base else 0.0
+  for w in weights:
+    total += w
+
+  loads: AxleLoads = {"payload_kg": total}
 
   # если нет осевой модели — просто payload
-  if a_pos is None or b_pos is None or abs(float(b_pos) - float(a_pos)) < 1e-9:
+  if not p.has_axles:
     loads["axleA_kg"] = 0.0
     loads["axleB_kg"] = 0.0
     return loads
 
-  L = float(vehicle["innerLength"])
-  z0 = -L / 2.0
-  span = float(b_pos) - float(a_pos)
+  z0 = p.z0
+  span = p.span
+  a = p.a_pos
 
-  axleA = 0.0
-  axleB = 0.0
+  axleA = float(base.get("axleA_kg", 0.0)) if base else 0.0
+  axleB = float(base.get("axleB_kg", 0.0)) if base else 0.0
 
-  for p in placed:
-    w = float(p.item.weight)
-    x_from_head = float(p.z) - z0  # z0 = -L/2 => x_from_head = z + L/2
+  for w, z in zip(weights, zs):
+    x_from_head = z - z0  # z0 = -L/2 => x_from_head = z + L/2
 
-    rb = w * (x_from_head - float(a_pos)) / span
+    rb = w * (x_from_head - a) / span
     ra = w - rb
     axleA += ra
     axleB += rb
@@ -46,20 +125,17 @@ def compute_loads(placed: List[PlacedItem], vehicle: Vehicle) -> AxleLoads:
   return loads
 
 
-def check_loads(loads: AxleLoads, vehicle: Vehicle) -> Tuple[bool, List[str]]:
+def check_loads(loads: AxleLoads, vehicle: Vehicle, params: Optional[AxleParams] = None) -> Tuple[bool, List[str]]:
   reasons: List[str] = []
+  p = params if params is not None else axle_params(vehicle)
 
-  payload_max = vehicle.get("payloadMaxKg")
-  if payload_max is not None and float(loads.get("payload_kg", 0.0)) > float(payload_max) + 1e-9:
-    reasons.append("payload_limit")
-
-  a_lim = vehicle.get("axleALimitKg")
-  b_lim = vehicle.get("axleBLimitKg")
+  if p.payload_max is not None and float(loads.get("payload_kg", 0.0)) > p.payload_max + 1e-9:
+    reasons.append(REASON_PAYLOAD)
 
-  if a_lim is not None and float(loads.get("axleA_kg", 0.0)) > float(a_lim) + 1e-9:
-    reasons.append("axleA_limit")
-  if b_lim is not None and float(loads.get("axleB_kg", 0.0)) > float(b_lim) + 1e-9:
-    reasons.append("axleB_limit")
+  if p.a_lim is not None and float(loads.get("axleA_kg", 0.0)) > p.a_lim + 1e-9:
+    reasons.append(REASON_AXLE_A)
+  if p.b_lim is not None and float(loads.get("axleB_kg", 0.0)) > p.b_lim + 1e-9:
+    reasons.append(REASON_AXLE_B)
 
   return (len(reasons) == 0, reasons)
 
@@ -69,8 +145,14 @@ def would_pass_with_candidate(
   candidate: Candidate,
   item,
   vehicle: Vehicle,
+  base_loads: Optional[AxleLoads] = None,
 ) -> Tuple[bool, List[str], AxleLoads]:
-  tmp = placed + [placed_from_candidate(candidate, item=item)]
-  loads = compute_loads(tmp, vehicle)
+  """
+  base_loads — уже посчитанные нагрузки по placed (например PlanState.loads):
+  тогда кандидат досуммируется за O(1); без них placed пересчитывается один раз,
+  но без копии списка и без PlacedItem под кандидата.
+  """
+  base = base_loads if base_loads is not None else compute_loads(placed, vehicle)
+  loads = compute_loads_delta(base, (float(item.weight),), (float(candidate.z),), vehicle)
   ok, reasons = check_loads(loads, vehicle)
   return ok, reasons, loads
@@ -1,19 +1,30 @@
 # constraints/bounds.py
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 from domain.types import Candidate, PlacedItem, Vehicle
 from geometry.aabb import collides_with_any, oob_check
+from geometry.spatial_hash import SpatialHash
+
+# причины отказа (те же строки отдаёт packer для групп паттернов)
+REASON_OOB = "oob"
+REASON_COLLISION = "collision"
 
 
 def check_oob(candidate: Candidate, vehicle: Vehicle) -> Tuple[bool, List[str]]:
-  if oob_check(candidate["aabb"], vehicle):
-    return (False, ["oob"])
+  if oob_check(candidate.aabb, vehicle):
+    return (False, [REASON_OOB])
   return (True, [])
 
 
-def check_collision(candidate: Candidate, placed: List[PlacedItem]) -> Tuple[bool, List[str]]:
-  if collides_with_any(candidate["aabb"], placed):
-    return (False, ["collision"])
+def check_collision(candidate: Candidate, placed: Union[List[PlacedItem], SpatialHash]) -> Tuple[bool, List[str]]:
+  # SpatialHash (PlanState.placed_index) — проверка только по соседям из сетки,
+  # список PlacedItem — полный перебор, как раньше
+  if isinstance(placed, SpatialHash):
+    hit = placed.collides(candidate.aabb)
+  else:
+    hit = collides_with_any(candidate.aabb, placed)
+  if hit:
+    return (False, [REASON_COLLISION])
   return (True, [])
@@ -1,8 +1,10 @@
 # constraints/policies.py
 from __future__ import annotations
 
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from domain.types import Candidate, Item, ModeDecision, Vehicle
 from catalogs.item import item_class
@@ -54,18 +56,29 @@ def x_from_head(z_center: float, vehicle: Vehicle) -> float:
   return float(z_center) + (L / 2.0)
 
 
+@lru_cache(maxsize=32)
+def _zone_bounds(inner_length: float, a: float, b: float, c: float) -> Tuple[float, float, float, float, float]:
+  """
+  (L/2, L, a_end, b_end, c_end) в координатах x_from_head.
+  Зависит только от длины кузова и ZoneConfig, поэтому считается один раз на пару.
+  """
+  L = inner_length
+  a_end = L * a
+  b_end = a_end + L * b
+  c_end = b_end + L * c
+  return (L / 2.0, L, a_end, b_end, c_end)
+
+
 def zone_for_z(z_center: float, vehicle: Vehicle, cfg: ZoneConfig = DEFAULT_ZONES) -> ZoneName:
-  L = float(vehicle["innerLength"])
-  x = x_from_head(z_center, vehicle)
+  half_L, L, a_end, b_end, c_end = _zone_bounds(float(vehicle["innerLength"]), cfg.a, cfg.b, cfg.c)
+
+  # то же, что x_from_head(), но L/2 уже из кеша
+  x = float(z_center) + half_L
   if x < 0.0:
     x = 0.0
   if x > L:
     x = L
 
-  a_end = L * cfg.a
-  b_end = a_end + L * cfg.b
-  c_end = b_end + L * cfg.c
-
   if x <= a_end:
     return "A"
   if x <= b_end:
@@ -90,8 +103,21 @@ class PolicyDecision:
   # Бонус (>=0): добавляется в objective как плюс
   zone_bonus: float
 
-  # Теги (для debug)
-  tags: Dict[str, str]
+  # Сырые значения для debug-тегов: dict собирается только по запросу (tags),
+  # а не на каждого кандидата
+  zone: ZoneName
+  cls: str
+  hi: bool
+  mode: str
+
+  @property
+  def tags(self) -> Dict[str, str]:
+    return {
+      "zone": self.zone,
+      "class": self.cls,
+      "hi": "1" if self.hi else "0",
+      "mode": self.mode,
+    }
 
 
 def _zones_from_settings(settings) -> ZoneConfig:
@@ -116,7 +142,81 @@ def _zones_from_settings(settings) -> ZoneConfig:
   return DEFAULT_ZONES
 
 
-def _is_high_value(item: Item, mode: ModeDecision, settings=SETTINGS) -> bool:
+@dataclass(frozen=True)
+class PolicyCoeffs:
+  """
+  Снимок коэффициентов policy из SETTINGS.
+  Строится один раз на план (policy_coeffs()), чтобы evaluate_candidate_policy
+  не делал ~16 getattr + float() на каждого кандидата.
+  """
+  zones: ZoneConfig
+
+  # high-value пороги
+  hi_weight_abs: float
+  hi_vol_abs: float
+  hi_weight_abs_mixed: float
+
+  # Weight mode
+  w_hi_ab_bonus: float
+  w_hi_cd_penalty: float
+  w_lo_cd_bonus: float
+  w_lo_ab_penalty: float
+
+  # Volume mode
+  v_big_abc_bonus: float
+  v_big_d_penalty: float
+  v_small_cd_bonus: float
+  big_footprint_m2: float
+
+  # Mixed mode
+  m_hi_ab_bonus: float
+  m_lo_ab_penalty: float
+
+  # Class guidance
+  oversize_bonus: float
+  box_ab_penalty: float
+  box_cd_bonus: float
+
+  # Hard rules toggles / specifics
+  hard_oversize_in_d: bool
+
+
+def policy_coeffs(settings=SETTINGS) -> PolicyCoeffs:
+  thr_w = float(_get_setting(settings, "POLICY_HI_WEIGHT_ABS", 700.0))
+  return PolicyCoeffs(
+    zones=_zones_from_settings(settings),
+
+    hi_weight_abs=thr_w,
+    hi_vol_abs=float(_get_setting(settings, "POLICY_HI_VOL_ABS", 1.0)),
+    hi_weight_abs_mixed=float(_get_setting(settings, "POLICY_HI_WEIGHT_ABS_MIXED", thr_w)),
+
+    w_hi_ab_bonus=float(_get_setting(settings, "POLICY_W_HI_AB_BONUS", 2.0)),
+    w_hi_cd_penalty=float(_get_setting(settings, "POLICY_W_HI_CD_PENALTY", 3.0)),
+    w_lo_cd_bonus=float(_get_setting(settings, "POLICY_W_LO_CD_BONUS", 0.5)),
+    w_lo_ab_penalty=float(_get_setting(settings, "POLICY_W_LO_AB_PENALTY", 0.5)),
+
+    v_big_abc_bonus=float(_get_setting(settings, "POLICY_V_BIG_ABC_BONUS", 1.0)),
+    v_big_d_penalty=float(_get_setting(settings, "POLICY_V_BIG_D_PENALTY", 2.0)),
+    v_small_cd_bonus=float(_get_setting(settings, "POLICY_V_SMALL_CD_BONUS", 0.5)),
+    big_footprint_m2=float(_get_setting(settings, "POLICY_BIG_FOOTPRINT_M2", 1.6)),
+
+    m_hi_ab_bonus=float(_get_setting(settings, "POLICY_M_HI_AB_BONUS", 1.5)),
+    m_lo_ab_penalty=float(_get_setting(settings, "POLICY_M_LO_AB_PENALTY", 0.5)),
+
+    oversize_bonus=float(_get_setting(settings, "POLICY_OVERSIZE_BONUS", 0.8)),
+    box_ab_penalty=float(_get_setting(settings, "POLICY_BOX_AB_PENALTY", 0.7)),
+    box_cd_bonus=float(_get_setting(settings, "POLICY_BOX_CD_BONUS", 1.5)),
+
+    hard_oversize_in_d=bool(_get_setting(settings, "POLICY_HARD_OVERSIZE_IN_D", False)),
+  )
+
+
+def _is_high_value(
+  item: Item,
+  mode: ModeDecision,
+  settings=SETTINGS,
+  coeffs: Optional[PolicyCoeffs] = None,
+) -> bool:
   """
   ВАЖНО: ratio = floor demand (паллетомест по полу), его нельзя использовать как делитель.
   High-value здесь — простая эвристика "тяжёлое/объёмное".
@@ -126,139 +226,204 @@ def _is_high_value(item: Item, mode: ModeDecision, settings=SETTINGS) -> bool:
   - POLICY_HI_VOL_ABS: м3 для mode=volume
   - POLICY_HI_WEIGHT_ABS_MIXED: кг для mode=mixed
   """
-  thr_w = float(_get_setting(settings, "POLICY_HI_WEIGHT_ABS", 700.0))
-  thr_vol = float(_get_setting(settings, "POLICY_HI_VOL_ABS", 1.0))
-  thr_mixed_w = float(_get_setting(settings, "POLICY_HI_WEIGHT_ABS_MIXED", thr_w))
+  co = coeffs if coeffs is not None else policy_coeffs(settings)
 
   w = max(0.0, float(item.weight))
   vol = max(0.0, float(item.width)) * max(0.0, float(item.length)) * max(0.0, float(item.height))
 
   if mode.mode == "weight":
-    return w >= thr_w
+    return w >= co.hi_weight_abs
 
   if mode.mode == "volume":
-    return vol >= thr_vol
+    return vol >= co.hi_vol_abs
 
   # mixed
-  return w >= thr_mixed_w
+  return w >= co.hi_weight_abs_mixed
 
 
-def evaluate_candidate_policy(
-  item: Item,
-  candidate: Candidate,
-  vehicle: Vehicle,
-  mode: ModeDecision,
-  *,
-  settings=SETTINGS,
-  allow_hard_rules: bool = False,
-) -> PolicyDecision:
-  """
-  Возвращает soft penalties/bonuses + (опционально) hard reject.
-  """
-  z = float(candidate["z"])
-  zone_cfg = _zones_from_settings(settings)
-  zone = zone_for_z(z, vehicle, cfg=zone_cfg)
+# -----------------------------------------------------------------------------
+# Guidance по зонам: свой обработчик на каждый режим
+# -----------------------------------------------------------------------------
+# Обработчик возвращает (penalty, bonus) только от зоны/режима;
+# надбавки по классу считаются общие, в evaluate_candidate_policy.
 
-  cls = item_class(item, vehicle_inner_width=float(vehicle["innerWidth"]))
-  hi = _is_high_value(item, mode, settings=settings)
+ModeHandler = Callable[[Item, ZoneName, bool, PolicyCoeffs], Tuple[float, float]]
 
-  hard: List[str] = []
-  penalty = 0.0
-  bonus = 0.0
 
-  # -------------------------
-  # Коэффициенты (settings)
-  # -------------------------
-  # Weight mode
-  W_HI_AB_BONUS = float(_get_setting(settings, "POLICY_W_HI_AB_BONUS", 2.0))
-  W_HI_CD_PENALTY = float(_get_setting(settings, "POLICY_W_HI_CD_PENALTY", 3.0))
-  W_LO_CD_BONUS = float(_get_setting(settings, "POLICY_W_LO_CD_BONUS", 0.5))
-  W_LO_AB_PENALTY = float(_get_setting(settings, "POLICY_W_LO_AB_PENALTY", 0.5))
+def _eval_weight(item: Item, zone: ZoneName, hi: bool, co: PolicyCoeffs) -> Tuple[float, float]:
+  if hi:
+    if zone in ("A", "B"):
+      return 0.0, co.w_hi_ab_bonus
+    return co.w_hi_cd_penalty, 0.0
+  if zone in ("C", "D"):
+    return 0.0, co.w_lo_cd_bonus
+  return co.w_lo_ab_penalty, 0.0
+
+
+def _eval_volume(item: Item, zone: ZoneName, hi: bool, co: PolicyCoeffs) -> Tuple[float, float]:
+  big_footprint = (float(item.width) * float(item.length)) >= co.big_footprint_m2
+  if big_footprint:
+    if zone in ("A", "B", "C"):
+      return 0.0, co.v_big_abc_bonus
+    return co.v_big_d_penalty, 0.0
+  if zone in ("C", "D"):
+    return 0.0, co.v_small_cd_bonus
+  return 0.0, 0.0
+
+
+def _eval_mixed(item: Item, zone: ZoneName, hi: bool, co: PolicyCoeffs) -> Tuple[float, float]:
+  if zone in ("A", "B"):
+    if hi:
+      return 0.0, co.m_hi_ab_bonus
+    return co.m_lo_ab_penalty, 0.0
+  return 0.0, 0.0
 
-  # Volume mode
-  V_BIG_ABC_BONUS = float(_get_setting(settings, "POLICY_V_BIG_ABC_BONUS", 1.0))
-  V_BIG_D_PENALTY = float(_get_setting(settings, "POLICY_V_BIG_D_PENALTY", 2.0))
-  V_SMALL_CD_BONUS = float(_get_setting(settings, "POLICY_V_SMALL_CD_BONUS", 0.5))
 
-  BIG_FOOTPRINT_M2 = float(_get_setting(settings, "POLICY_BIG_FOOTPRINT_M2", 1.6))
+_MODE_HANDLERS: Dict[str, ModeHandler] = {
+  "weight": _eval_weight,
+  "volume": _eval_volume,
+  "mixed": _eval_mixed,
+}
 
-  # Mixed mode
-  M_HI_AB_BONUS = float(_get_setting(settings, "POLICY_M_HI_AB_BONUS", 1.5))
-  M_LO_AB_PENALTY = float(_get_setting(settings, "POLICY_M_LO_AB_PENALTY", 0.5))
 
-  # Class guidance
-  OVERSIZE_BONUS = float(_get_setting(settings, "POLICY_OVERSIZE_BONUS", 0.8))
-  BOX_AB_PENALTY = float(_get_setting(settings, "POLICY_BOX_AB_PENALTY", 0.7))
-  BOX_CD_BONUS = float(_get_setting(settings, "POLICY_BOX_CD_BONUS", 1.5))
+def mode_handler(mode: ModeDecision) -> ModeHandler:
+  """
+  Обработчик guidance для режима плана. Режим на план один,
+  поэтому планировщик выбирает его один раз и передаёт в evaluate_candidate_policy.
+  Неизвестный режим ведёт себя как mixed (как прежняя ветка else).
+  """
+  return _MODE_HANDLERS.get(mode.mode, _eval_mixed)
 
-  # Hard rules toggles / specifics
-  HARD_OVERSIZE_IN_D = bool(_get_setting(settings, "POLICY_HARD_OVERSIZE_IN_D", False))
 
+def _zone_terms(
+  item: Item,
+  zone: ZoneName,
+  cls: str,
+  hi: bool,
+  co: PolicyCoeffs,
+  handler: ModeHandler,
+) -> Tuple[float, float]:
+  """
+  (penalty, bonus) для паллеты в зоне: guidance режима + надбавки по классу.
+  """
   # -------------------------
   # Guidance по зонам
   # -------------------------
-  if mode.mode == "weight":
-    if hi:
-      if zone in ("A", "B"):
-        bonus += W_HI_AB_BONUS
-      else:
-        penalty += W_HI_CD_PENALTY
-    else:
-      if zone in ("C", "D"):
-        bonus += W_LO_CD_BONUS
-      else:
-        penalty += W_LO_AB_PENALTY
-
-  elif mode.mode == "volume":
-    big_footprint = (float(item.width) * float(item.length)) >= BIG_FOOTPRINT_M2
-    if big_footprint:
-      if zone in ("A", "B", "C"):
-        bonus += V_BIG_ABC_BONUS
-      else:
-        penalty += V_BIG_D_PENALTY
-    else:
-      if zone in ("C", "D"):
-        bonus += V_SMALL_CD_BONUS
-
-  else:
-    if hi and zone in ("A", "B"):
-      bonus += M_HI_AB_BONUS
-    if (not hi) and zone in ("A", "B"):
-      penalty += M_LO_AB_PENALTY
+  penalty, bonus = handler(item, zone, hi, co)
 
   # -------------------------
   # Очередность типов (как предпочтение, не запрет)
   # -------------------------
   if cls == "oversize":
-    bonus += OVERSIZE_BONUS
+    bonus += co.oversize_bonus
 
   if cls == "box":
     if zone in ("A", "B"):
-      penalty += BOX_AB_PENALTY
+      penalty += co.box_ab_penalty
     else:
-      bonus += BOX_CD_BONUS
+      bonus += co.box_cd_bonus
 
+  return penalty, bonus
+
+
+def evaluate_candidate_policy(
+  item: Item,
+  candidate: Candidate,
+  vehicle: Vehicle,
+  mode: ModeDecision,
+  *,
+  settings=SETTINGS,
+  allow_hard_rules: bool = False,
+  coeffs: Optional[PolicyCoeffs] = None,
+  handler: Optional[ModeHandler] = None,
+) -> PolicyDecision:
+  """
+  Возвращает soft penalties/bonuses + (опционально) hard reject.
+  coeffs — заранее снятый policy_coeffs(settings); без него снимается на каждый вызов.
+  handler — заранее выбранный mode_handler(mode); без него выбирается по mode.mode.
+  """
+  co = coeffs if coeffs is not None else policy_coeffs(settings)
+
+  z = float(candidate.z)
+  zone = zone_for_z(z, vehicle, cfg=co.zones)
+
+  cls = item_class(item, vehicle_inner_width=float(vehicle["innerWidth"]))
+  hi = _is_high_value(item, mode, coeffs=co)
+
+  hard: List[str] = []
+
+  if handler is None:
+    handler = mode_handler(mode)
+  penalty, bonus = _zone_terms(item, zone, cls, hi, co, handler)
 
   # -------------------------
   # Hard rules (по умолчанию выключены)
   # -------------------------
   if allow_hard_rules:
-    if HARD_OVERSIZE_IN_D and cls == "oversize" and zone == "D":
+    if co.hard_oversize_in_d and cls == "oversize" and zone == "D":
       hard.append("oversize_in_D")
 
   return PolicyDecision(
     hard_reject_reasons=hard,
     zone_penalty=penalty,
     zone_bonus=bonus,
-    tags={
-      "zone": zone,
-      "class": cls,
-      "hi": "1" if hi else "0",
-      "mode": mode.mode,
-    },
+    zone=zone,
+    cls=cls,
+    hi=hi,
+    mode=mode.mode,
   )
 
 
+ZONE_NAMES: Tuple[ZoneName, ...] = ("A", "B", "C", "D")
+
+
+def evaluate_candidates_policy(
+  item: Item,
+  zs: Sequence[float],
+  vehicle: Vehicle,
+  mode: ModeDecision,
+  *,
+  settings=SETTINGS,
+  coeffs: Optional[PolicyCoeffs] = None,
+  handler: Optional[ModeHandler] = None,
+) -> Tuple[List[float], List[float]]:
+  """
+  Пакетный evaluate_candidate_policy для N кандидатов ОДНОЙ паллеты: (penalties, bonuses) по zs.
+  Класс, hi и (penalty, bonus) на каждую из 4 зон считаются один раз на паллету,
+  дальше на кандидата остаётся только найти зону по z (bisect по границам) и взять из таблицы.
+
+  Hard rules сюда не входят (как при allow_hard_rules=False): где они нужны — evaluate_candidate_policy.
+  """
+  co = coeffs if coeffs is not None else policy_coeffs(settings)
+  if handler is None:
+    handler = mode_handler(mode)
+
+  cls = item_class(item, vehicle_inner_width=float(vehicle["innerWidth"]))
+  hi = _is_high_value(item, mode, coeffs=co)
+
+  table = [_zone_terms(item, zone, cls, hi, co, handler) for zone in ZONE_NAMES]
+  pen_by_zone = [t[0] for t in table]
+  bon_by_zone = [t[1] for t in table]
+
+  cfg = co.zones
+  half_L, L, a_end, b_end, c_end = _zone_bounds(float(vehicle["innerLength"]), cfg.a, cfg.b, cfg.c)
+  bounds = (a_end, b_end, c_end)
+
+  penalties: List[float] = []
+  bonuses: List[float] = []
+  for z in zs:
+    # тот же clamp, что в zone_for_z; bisect_left: x <= a_end -> 0 (A), ..., x > c_end -> 3 (D)
+    x = float(z) + half_L
+    if x < 0.0:
+      x = 0.0
+    if x > L:
+      x = L
+    zi = bisect_left(bounds, x)
+    penalties.append(pen_by_zone[zi])
+    bonuses.append(bon_by_zone[zi])
+  return penalties, bonuses
+
+
 # -----------------------------------------------------------------------------
 # Policy: порядок очереди (до генерации кандидатов)
 # -----------------------------------------------------------------------------
@@ -6,6 +6,15 @@ from typing import Any, Callable, Dict, Optional
 DebugLogFn = Callable[[str, Dict[str, Any]], None]
 
 
+def _noop_log(evt: str, payload: Dict[str, Any]) -> None:
+  return None
+
+
+# лог-заглушка: `debug_log = debug_log or NOOP_LOG` один раз на входе,
+# дальше вызовы без `if debug_log:` на каждом событии
+NOOP_LOG: DebugLogFn = _noop_log
+
+
 def emit(log: Optional[DebugLogFn], evt: str, payload: Dict[str, Any]) -> None:
   if not log:
     return
@@ -1,8 +1,8 @@
 # domain/types.py
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, TypedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Literal, NamedTuple, Optional, Tuple, TypedDict
 
 
 # ----------------------------
@@ -44,7 +44,7 @@ class Vehicle(TypedDict, total=False):
 # Domain модели
 # ----------------------------
 
-@dataclass
+@dataclass(slots=True)
 class Item:
   # идентификаторы / служебные
   id: str  # sscc (drop_container_id)
@@ -72,14 +72,28 @@ class Item:
 
   status: ItemStatus = "ok"
 
+  # кеш классификации под паттерны ("std" 80x120 / "big" 140x120 / "" — ни то, ни другое);
+  # заполняется лениво в candidates.patterns.split_pattern_items, в сравнении и repr не участвует
+  patternClass: Optional[str] = field(default=None, compare=False, repr=False)
+
+  # объём (м3), считается один раз при создании: scoring читает его вместо w*l*h на каждого кандидата
+  volumeM3: float = field(init=False, default=0.0, compare=False, repr=False)
+
+  def __post_init__(self) -> None:
+    self.volumeM3 = max(self.width, 0.0) * max(self.length, 0.0) * max(self.height, 0.0)
+
   def volume(self) -> float:
-    return max(self.width, 0.0) * max(self.length, 0.0) * max(self.height, 0.0)
+    return self.volumeM3
 
   def footprint(self) -> float:
     return max(self.width, 0.0) * max(self.length, 0.0)
 
 
-class AABB(TypedDict):
+class AABB(NamedTuple):
+  """
+  Плоский кортеж с именованными полями: строится дешевле dict,
+  а поля читаются как aabb.minX. В JSON отдаётся через aabb_to_dict().
+  """
   minX: float
   maxX: float
   minY: float
@@ -88,7 +102,15 @@ class AABB(TypedDict):
   maxZ: float
 
 
-@dataclass
+def aabb_to_dict(a: AABB) -> Dict[str, float]:
+  """
+  AABB -> {"minX": .., "maxX": .., ...}: только для JSON-границы (PlanResult / viewer),
+  внутри солвера AABB остаётся кортежем.
+  """
+  return a._asdict()
+
+
+@dataclass(slots=True)
 class PlacedItem:
   item: Item
   x: float
@@ -102,7 +124,9 @@ class PlacedItem:
   status: ItemStatus = "ok"
 
 
-class Candidate(TypedDict):
+@dataclass(slots=True)
+class Candidate:
+  # кандидатов тысячи на каждый шаг packer-а: slots вместо dict (память + доступ к полям)
   itemId: str
   x: float
   y: float
@@ -115,7 +139,23 @@ class Candidate(TypedDict):
 
   aabb: AABB
   kind: str
-  meta: Dict[str, Any]
+
+  # free-rect (minX, maxX, minZ, maxZ), в котором сгенерирован кандидат:
+  # один и тот же tuple из FreeRects на всех кандидатов этого rect, без копий
+  rect: Optional[Tuple[float, float, float, float]] = None
+
+  # дебаг-поля паттерна (pattern, slotZ0, kRank, ...); у single — None
+  meta: Optional[Dict[str, Any]] = None
+
+  # группа паттерна (уникальна на каждый pack); None — single
+  patternId: Optional[int] = None
+
+  # площадь основания dx*dz, считается один раз при создании: score/quality читают её,
+  # а не перемножают габариты на каждой оценке
+  area: float = field(init=False, default=0.0, compare=False, repr=False)
+
+  def __post_init__(self) -> None:
+    self.area = self.dx * self.dz
 
 
 class AxleLoads(TypedDict, total=False):
@@ -124,7 +164,7 @@ class AxleLoads(TypedDict, total=False):
   payload_kg: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ModeDecision:
   mode: ModeName
   weight_pressure: float
@@ -132,14 +172,27 @@ class ModeDecision:
   volume_pressure: float
   alpha: Optional[float] = None
 
+  # доля веса в K: weight -> 1.0, volume -> 0.0, mixed (и прочее) -> alpha (0.5 по умолчанию);
+  # считается один раз здесь, чтобы compute_k не ветвился по mode на каждом вызове
+  alpha_effective: float = field(init=False, default=0.5, compare=False, repr=False)
+
+  def __post_init__(self) -> None:
+    if self.mode == "weight":
+      a = 1.0
+    elif self.mode == "volume":
+      a = 0.0
+    else:
+      a = float(self.alpha) if self.alpha is not None else 0.5
+    object.__setattr__(self, "alpha_effective", a)
+
 
-@dataclass
+@dataclass(slots=True)
 class DebugEvent:
   evt: str
   payload: Dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class PlanResult:
   taskId: str
   transportType: str
@@ -152,14 +205,15 @@ class PlanResult:
 
   def to_dict(self) -> Dict[str, Any]:
     placed_out: List[Dict[str, Any]] = []
+    append = placed_out.append
     for p in self.placed:
-      placed_out.append({
+      append({
         "id": p.item.id,
         "sscc": p.item.dropContainerId or p.item.id,
         "x": p.x, "y": p.y, "z": p.z,
         "rotationY": p.rotationY,
         "dims": {"dx": p.dims[0], "dy": p.dims[1], "dz": p.dims[2]},
-        "aabb": dict(p.aabb),
+        "aabb": aabb_to_dict(p.aabb),
         "corner": dict(p.corner),
         "status": p.status,
         "weight": p.item.weight,
@@ -183,9 +237,17 @@ class PlanResult:
       "taskId": self.taskId,
       "transportType": self.transportType,
       "vehicle": dict(self.vehicle),
-      "mode": asdict(self.mode),
+      "mode": {
+        "mode": self.mode.mode,
+        "weight_pressure": self.mode.weight_pressure,
+        "floor_pressure": self.mode.floor_pressure,
+        "volume_pressure": self.mode.volume_pressure,
+        "alpha": self.mode.alpha,
+      },
       "placed": placed_out,
       "unplaced": unplaced_out,
       "loads": (dict(self.loads) if self.loads else None),
-      "debug": ([asdict(e) for e in (self.debug or [])]),
+      # без asdict(): он рекурсивно deep-copy-ит каждый payload,
+      # а payload-ы после упаковки уже никто не меняет
+      "debug": [{"evt": e.evt, "payload": e.payload} for e in (self.debug or [])],
     }
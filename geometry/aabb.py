@@ -1,45 +1,115 @@
 # geometry/aabb.py
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Iterable, List, Tuple
 
 from domain.types import AABB, PlacedItem, Vehicle
 
+# допуск по умолчанию для публичных проверок; внутри циклов сравнения идут с ним напрямую
+_EPS = 1e-9
+
 
 def aabb_from_center(x: float, y: float, z: float, dx: float, dy: float, dz: float) -> AABB:
-  return {
-    "minX": x - dx / 2.0, "maxX": x + dx / 2.0,
-    "minY": y - dy / 2.0, "maxY": y + dy / 2.0,
-    "minZ": z - dz / 2.0, "maxZ": z + dz / 2.0,
-  }
+  return AABB(
+    x - dx / 2.0, x + dx / 2.0,
+    y - dy / 2.0, y + dy / 2.0,
+    z - dz / 2.0, z + dz / 2.0,
+  )
+
+
+def aabb_from_center_batch(
+  centers: Iterable[Tuple[float, float, float]],
+  dx: float,
+  dy: float,
+  dz: float,
+) -> List[AABB]:
+  """
+  Пакетный aabb_from_center для боксов одинаковых габаритов (одна паллета в разных позициях):
+  полуразмеры считаются один раз на весь пакет.
+  """
+  hx, hy, hz = dx / 2.0, dy / 2.0, dz / 2.0
+  return [
+    AABB(
+      x - hx, x + hx,
+      y - hy, y + hy,
+      z - hz, z + hz,
+    )
+    for x, y, z in centers
+  ]
+
 
+def aabb_union(a: AABB, b: AABB) -> AABB:
+  return AABB(
+    min(a.minX, b.minX), max(a.maxX, b.maxX),
+    min(a.minY, b.minY), max(a.maxY, b.maxY),
+    min(a.minZ, b.minZ), max(a.maxZ, b.maxZ),
+  )
 
-def aabb_intersects(a: AABB, b: AABB, eps: float = 1e-9) -> bool:
-  if a["maxX"] <= b["minX"] + eps or a["minX"] >= b["maxX"] - eps:
+
+def aabb_union_batch(aabbs: Iterable[AABB]) -> AABB:
+  # общий bbox непустого набора боксов: колонки через zip и встроенные min/max
+  xs0, xs1, ys0, ys1, zs0, zs1 = zip(*aabbs)
+  return AABB(min(xs0), max(xs1), min(ys0), max(ys1), min(zs0), max(zs1))
+
+
+def aabb_intersects(a: AABB, b: AABB, eps: float = _EPS) -> bool:
+  # распаковка кортежей в локальные — дешевле шести обращений к полям на каждую сторону
+  ax0, ax1, ay0, ay1, az0, az1 = a
+  bx0, bx1, by0, by1, bz0, bz1 = b
+  if ax1 <= bx0 + eps or ax0 >= bx1 - eps:
     return False
-  if a["maxY"] <= b["minY"] + eps or a["minY"] >= b["maxY"] - eps:
+  if ay1 <= by0 + eps or ay0 >= by1 - eps:
     return False
-  if a["maxZ"] <= b["minZ"] + eps or a["minZ"] >= b["maxZ"] - eps:
+  if az1 <= bz0 + eps or az0 >= bz1 - eps:
     return False
   return True
 
 
-def oob_check(aabb: AABB, vehicle: Vehicle, eps: float = 1e-9) -> bool:
+def oob_check(aabb: AABB, vehicle: Vehicle, eps: float = _EPS) -> bool:
   half_w = float(vehicle["innerWidth"]) / 2.0
   half_l = float(vehicle["innerLength"]) / 2.0
   inner_h = float(vehicle["innerHeight"])
 
-  if aabb["minX"] < -half_w - eps or aabb["maxX"] > half_w + eps:
+  minX, maxX, minY, maxY, minZ, maxZ = aabb
+  if minX < -half_w - eps or maxX > half_w + eps:
     return True
-  if aabb["minZ"] < -half_l - eps or aabb["maxZ"] > half_l + eps:
+  if minZ < -half_l - eps or maxZ > half_l + eps:
     return True
-  if aabb["minY"] < 0.0 - eps or aabb["maxY"] > inner_h + eps:
+  if minY < 0.0 - eps or maxY > inner_h + eps:
     return True
   return False
 
 
-def collides_with_any(aabb: AABB, placed: Iterable[PlacedItem], eps: float = 1e-9) -> bool:
+def oob_mask_batch(aabbs: Iterable[AABB], vehicle: Vehicle, eps: float = _EPS) -> List[bool]:
+  """
+  Пакетный oob_check: True для каждого AABB, который вылезает за кузов.
+  Границы кузова приводятся к float один раз на весь пакет, а не на каждый бокс;
+  для одиночной проверки остаётся oob_check().
+  """
+  half_w = float(vehicle["innerWidth"]) / 2.0
+  half_l = float(vehicle["innerLength"]) / 2.0
+  inner_h = float(vehicle["innerHeight"])
+
+  lo_x, hi_x = -half_w - eps, half_w + eps
+  lo_z, hi_z = -half_l - eps, half_l + eps
+  lo_y, hi_y = 0.0 - eps, inner_h + eps
+
+  return [
+    minX < lo_x or maxX > hi_x or minZ < lo_z or maxZ > hi_z or minY < lo_y or maxY > hi_y
+    for minX, maxX, minY, maxY, minZ, maxZ in aabbs
+  ]
+
+
+def collides_with_any(aabb: AABB, placed: Iterable[PlacedItem], eps: float = _EPS) -> bool:
+  # aabb_intersects() inline: кандидат распаковывается один раз, без вызова на каждый бокс
+  ax0, ax1, ay0, ay1, az0, az1 = aabb
   for p in placed:
-    if aabb_intersects(aabb, p.aabb, eps=eps):
-      return True
+    bx0, bx1, by0, by1, bz0, bz1 = p.aabb
+    if ax1 <= bx0 + eps or ax0 >= bx1 - eps:
+      continue
+    if ay1 <= by0 + eps or ay0 >= by1 - eps:
+      continue
+    if az1 <= bz0 + eps or az0 >= bz1 - eps:
+      continue
+    return True
   return False
@@ -1,6 +1,7 @@
 # geometry/free_rects.py
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import dataclass
 from typing import List, Tuple
 
@@ -8,6 +9,11 @@ from domain.types import Vehicle
 
 Rect = Tuple[float, float, float, float]  # (minX, maxX, minZ, maxZ)
 
+# допуски модуля: публичные функции берут их как default eps,
+# внутренние горячие циклы сравнивают с ними напрямую, без передачи eps
+_EPS = 1e-9
+_MERGE_EPS = 1e-6
+
 
 # ----------------------------
 # Basic rect ops
@@ -16,14 +22,14 @@ def rect_area(r: Rect) -> float:
   return max(0.0, r[1] - r[0]) * max(0.0, r[3] - r[2])
 
 
-def rect_contains(big: Rect, small: Rect, eps: float = 1e-9) -> bool:
+def rect_contains(big: Rect, small: Rect, eps: float = _EPS) -> bool:
   return (
     small[0] >= big[0] - eps and small[1] <= big[1] + eps and
     small[2] >= big[2] - eps and small[3] <= big[3] + eps
   )
 
 
-def rect_intersects(a: Rect, b: Rect, eps: float = 1e-9) -> bool:
+def rect_intersects(a: Rect, b: Rect, eps: float = _EPS) -> bool:
   if a[1] <= b[0] + eps or a[0] >= b[1] - eps:
     return False
   if a[3] <= b[2] + eps or a[2] >= b[3] - eps:
@@ -31,7 +37,7 @@ def rect_intersects(a: Rect, b: Rect, eps: float = 1e-9) -> bool:
   return True
 
 
-def split_rect(free: Rect, used: Rect, eps: float = 1e-9) -> List[Rect]:
+def split_rect(free: Rect, used: Rect, eps: float = _EPS) -> List[Rect]:
   """
   Split a free rect by removing the intersecting area with `used`.
   NOTE: used is assumed axis-aligned in the same XZ plane.
@@ -54,20 +60,27 @@ def split_rect(free: Rect, used: Rect, eps: float = 1e-9) -> List[Rect]:
   if uz1 < fz1 - eps:
     out.append((max(fx0, ux0), min(fx1, ux1), max(uz1, fz0), fz1))
 
-  return [r for r in out if rect_area(r) > 1e-9]
+  # rect_area() inline, без вызова на каждую полосу
+  return [r for r in out if max(0.0, r[1] - r[0]) * max(0.0, r[3] - r[2]) > 1e-9]
 
 
-def prune_contained(rects: List[Rect], eps: float = 1e-9) -> List[Rect]:
+def prune_contained(rects: List[Rect], eps: float = _EPS) -> List[Rect]:
   """
   Remove rectangles that are fully contained in other rectangles.
   """
+  if len(rects) >= _PRUNE_SWEEP_MIN:
+    return _prune_contained_sweep(rects, eps)
+
   out: List[Rect] = []
   for i, r in enumerate(rects):
     contained = False
+    rx0, rx1, rz0, rz1 = r
     for j, other in enumerate(rects):
       if i == j:
         continue
-      if rect_contains(other, r, eps=eps):
+      # rect_contains(other, r) inline
+      if (rx0 >= other[0] - eps and rx1 <= other[1] + eps and
+          rz0 >= other[2] - eps and rz1 <= other[3] + eps):
         contained = True
         break
     if not contained:
@@ -75,13 +88,51 @@ def prune_contained(rects: List[Rect], eps: float = 1e-9) -> List[Rect]:
   return out
 
 
+# на малых N квадратичный проход дешевле сортировки
+_PRUNE_SWEEP_MIN = 16
+
+
+def _prune_contained_sweep(rects: List[Rect], eps: float) -> List[Rect]:
+  """
+  Same result as the quadratic prune_contained (same order, same eps rules,
+  exact duplicates still remove each other), but candidates are cut by a sweep:
+  a container must have x0 <= r.x0 + eps, so rects are sorted by x0 and only
+  that prefix is checked; a running max of x1 over the prefix rejects
+  most rects without scanning it at all.
+  """
+  order = sorted(range(len(rects)), key=lambda i: rects[i][0])
+  xs0 = [rects[i][0] for i in order]
+
+  prefix_max_x1: List[float] = []
+  m = float("-inf")
+  for i in order:
+    x1 = rects[i][1]
+    if x1 > m:
+      m = x1
+    prefix_max_x1.append(m)
+
+  out: List[Rect] = []
+  for i, r in enumerate(rects):
+    rx0, rx1, rz0, rz1 = r
+    k = bisect_right(xs0, rx0 + eps)
+    contained = False
+    if k > 0 and prefix_max_x1[k - 1] >= rx1 - eps:
+      for pos in range(k):
+        j = order[pos]
+        if j == i:
+          continue
+        ox0, ox1, oz0, oz1 = rects[j]
+        if ox1 >= rx1 - eps and oz0 <= rz0 + eps and oz1 >= rz1 - eps:
+          contained = True
+          break
+    if not contained:
+      out.append(r)
+  return out
+
+
 # ----------------------------
 # Merging (snap / "схлопывание")
 # ----------------------------
-def _almost_equal(a: float, b: float, eps: float) -> bool:
-  return abs(a - b) <= eps
-
-
 def _normalize_rect(r: Rect, eps: float) -> Rect:
   """
   Normalize tiny negative zeros / tiny eps drift.
@@ -103,7 +154,30 @@ def _normalize_rect(r: Rect, eps: float) -> Rect:
   return (x0, x1, z0, z1)
 
 
-def merge_adjacent(rects: List[Rect], eps: float = 1e-6, max_iters: int = 50) -> List[Rect]:
+def _try_merge(a: Rect, b: Rect, eps: float) -> Rect | None:
+  """
+  Attempt to merge two rects, return merged or None.
+  Module-level (not a closure), eps comparisons inlined: called O(N^2) times per pass.
+  """
+  ax0, ax1, az0, az1 = a
+  bx0, bx1, bz0, bz1 = b
+
+  # Merge along X: same Z-span
+  if abs(az0 - bz0) <= eps and abs(az1 - bz1) <= eps:
+    # If they touch/overlap in X
+    if (ax1 >= bx0 - eps and bx1 >= ax0 - eps):
+      return (min(ax0, bx0), max(ax1, bx1), az0, az1)
+
+  # Merge along Z: same X-span
+  if abs(ax0 - bx0) <= eps and abs(ax1 - bx1) <= eps:
+    # If they touch/overlap in Z
+    if (az1 >= bz0 - eps and bz1 >= az0 - eps):
+      return (ax0, ax1, min(az0, bz0), max(az1, bz1))
+
+  return None
+
+
+def merge_adjacent(rects: List[Rect], eps: float = _MERGE_EPS, max_iters: int = 50) -> List[Rect]:
   """
   Merge rectangles that are adjacent (share a full edge) to reduce fragmentation.
 
@@ -119,29 +193,7 @@ def merge_adjacent(rects: List[Rect], eps: float = 1e-6, max_iters: int = 50) ->
     return []
 
   cur = [_normalize_rect(r, eps) for r in rects if rect_area(r) > 1e-9]
-
-  # Small helper: attempt to merge two rects, return merged or None
-  def try_merge(a: Rect, b: Rect) -> Rect | None:
-    ax0, ax1, az0, az1 = a
-    bx0, bx1, bz0, bz1 = b
-
-    # Merge along X: same Z-span
-    if _almost_equal(az0, bz0, eps) and _almost_equal(az1, bz1, eps):
-      # If they touch/overlap in X
-      if (ax1 >= bx0 - eps and bx1 >= ax0 - eps):
-        nx0 = min(ax0, bx0)
-        nx1 = max(ax1, bx1)
-        return (nx0, nx1, az0, az1)
-
-    # Merge along Z: same X-span
-    if _almost_equal(ax0, bx0, eps) and _almost_equal(ax1, bx1, eps):
-      # If they touch/overlap in Z
-      if (az1 >= bz0 - eps and bz1 >= az0 - eps):
-        nz0 = min(az0, bz0)
-        nz1 = max(az1, bz1)
-        return (ax0, ax1, nz0, nz1)
-
-    return None
+  try_merge = _try_merge
 
   # Iterate until no merges occur (fixpoint), with safety cap
   for _ in range(max_iters):
@@ -163,7 +215,7 @@ def merge_adjacent(rects: List[Rect], eps: float = 1e-6, max_iters: int = 50) ->
           if i == j or used[j]:
             continue
           b = cur[j]
-          m = try_merge(merged, b)
+          m = try_merge(merged, b, eps)
           if m is not None:
             merged = _normalize_rect(m, eps)
             used[j] = True
@@ -206,16 +258,30 @@ class FreeRects:
     IMPORTANT: `used` must be in the same XZ coordinate system (centered vehicle).
     """
     new_rects: List[Rect] = []
+    append = new_rects.append
+    hit = False
+    ux0, ux1, uz0, uz1 = used
+    # rect_intersects() inline с допуском модуля
+    lo_x, hi_x = ux0 + _EPS, ux1 - _EPS
+    lo_z, hi_z = uz0 + _EPS, uz1 - _EPS
     for r in self.rects:
-      if not rect_intersects(r, used):
-        new_rects.append(r)
+      if r[1] <= lo_x or r[0] >= hi_x or r[3] <= lo_z or r[2] >= hi_z:
+        append(r)
       else:
+        hit = True
         new_rects.extend(split_rect(r, used))
 
+    # ничего не задето: набор уже после prune/merge прошлого reserve(),
+    # повторный проход его не изменит — оставляем как есть
+    if not hit:
+      return
+
     # 1) drop contained
     new_rects = prune_contained(new_rects)
 
-    # 2) merge adjacent to reduce fragmentation ("схлопывание")
-    new_rects = merge_adjacent(new_rects, eps=1e-6)
+    # 2) merge adjacent to reduce fragmentation ("схлопывание").
+    # Именно жадный merge_adjacent: порядок rect-ов в результате (первое вхождение)
+    # влияет на tie-break по площади в генераторе кандидатов
+    new_rects = merge_adjacent(new_rects)
 
     self.rects = new_rects
@@ -0,0 +1,177 @@
+# geometry/spatial_hash.py
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from domain.types import AABB
+
+Cell = Tuple[int, int]  # (ix, iz)
+
+
+# ----------------------------
+# Размер ячейки
+# ----------------------------
+CELL_DEFAULT = 0.6
+CELL_MIN = 0.3
+CELL_MAX = 1.5
+
+
+def cell_for_sides(sides: Sequence[float]) -> float:
+  """
+  Ячейка сетки ~ медиана короткой стороны паллет плана: бокс ложится в 1-4 ячейки,
+  а в ячейке мало лишних соседей. Пусто/мусор -> CELL_DEFAULT; зажимаем в [CELL_MIN, CELL_MAX].
+  """
+  xs = sorted(x for x in sides if x > 0.0)
+  if not xs:
+    return CELL_DEFAULT
+  med = xs[len(xs) // 2]
+  return min(CELL_MAX, max(CELL_MIN, med))
+
+
+# ----------------------------
+# Broadphase для коллизий
+# ----------------------------
+@dataclass
+class SpatialHash:
+  """
+  Равномерная сетка по XZ поверх поставленных AABB.
+  Бокс регистрируется во всех ячейках, которые задевает, поэтому проверка
+  кандидата трогает только соседей по ячейкам, а не весь placed.
+  Сетка двумерная: по Y (ярусы) отсекает уже точная проверка интервалов.
+
+  cell ~ характерный размер паллеты: меньше — больше ячеек на бокс,
+  больше — больше лишних соседей в ячейке.
+
+  Сами границы хранятся SoA — шесть параллельных списков float по индексу бокса:
+  узкая фаза читает их напрямую, без распаковки AABB и вызова aabb_intersects.
+  """
+  cell: float = CELL_DEFAULT
+  minX: List[float] = field(default_factory=list)
+  maxX: List[float] = field(default_factory=list)
+  minY: List[float] = field(default_factory=list)
+  maxY: List[float] = field(default_factory=list)
+  minZ: List[float] = field(default_factory=list)
+  maxZ: List[float] = field(default_factory=list)
+  cells: Dict[Cell, List[int]] = field(default_factory=dict)
+
+  def __len__(self) -> int:
+    return len(self.minX)
+
+  def _cell_range(self, aabb: AABB) -> Tuple[int, int, int, int]:
+    inv = 1.0 / self.cell
+    return (
+      math.floor(aabb.minX * inv), math.floor(aabb.maxX * inv),
+      math.floor(aabb.minZ * inv), math.floor(aabb.maxZ * inv),
+    )
+
+  def insert(self, aabb: AABB) -> int:
+    idx = len(self.minX)
+    self.minX.append(aabb.minX)
+    self.maxX.append(aabb.maxX)
+    self.minY.append(aabb.minY)
+    self.maxY.append(aabb.maxY)
+    self.minZ.append(aabb.minZ)
+    self.maxZ.append(aabb.maxZ)
+
+    ix0, ix1, iz0, iz1 = self._cell_range(aabb)
+    cells = self.cells
+    for ix in range(ix0, ix1 + 1):
+      for iz in range(iz0, iz1 + 1):
+        bucket = cells.get((ix, iz))
+        if bucket is None:
+          cells[(ix, iz)] = [idx]
+        else:
+          bucket.append(idx)
+    return idx
+
+  def query(self, aabb: AABB) -> Iterator[int]:
+    """
+    Индексы боксов, делящих с aabb хотя бы одну ячейку (каждый — один раз).
+    Пересекающиеся по внутренности боксы всегда делят ячейку, так что ничего не теряется.
+    """
+    ix0, ix1, iz0, iz1 = self._cell_range(aabb)
+    cells = self.cells
+    seen = set()
+    for ix in range(ix0, ix1 + 1):
+      for iz in range(iz0, iz1 + 1):
+        bucket = cells.get((ix, iz))
+        if not bucket:
+          continue
+        for idx in bucket:
+          if idx not in seen:
+            seen.add(idx)
+            yield idx
+
+  def collides(self, aabb: AABB, eps: float = 1e-9) -> bool:
+    # та же проверка, что aabb_intersects, но по SoA-спискам и без генератора query()
+    ax0, ax1, ay0, ay1, az0, az1 = aabb
+    minX, maxX = self.minX, self.maxX
+    minY, maxY = self.minY, self.maxY
+    minZ, maxZ = self.minZ, self.maxZ
+
+    ix0, ix1, iz0, iz1 = self._cell_range(aabb)
+    cells = self.cells
+    seen = set()
+    for ix in range(ix0, ix1 + 1):
+      for iz in range(iz0, iz1 + 1):
+        bucket = cells.get((ix, iz))
+        if not bucket:
+          continue
+        for idx in bucket:
+          if idx in seen:
+            continue
+          seen.add(idx)
+          if ax1 <= minX[idx] + eps or ax0 >= maxX[idx] - eps:
+            continue
+          if ay1 <= minY[idx] + eps or ay0 >= maxY[idx] - eps:
+            continue
+          if az1 <= minZ[idx] + eps or az0 >= maxZ[idx] - eps:
+            continue
+          return True
+    return False
+
+  def first_collision(self, aabbs: Sequence[AABB], eps: float = 1e-9, since: int = 0) -> int:
+    """
+    Пакетный collides() для группы соседних боксов (паттерн): индекс первого aabb,
+    который пересекает что-то из поставленного, или -1.
+    Соседей собираем один раз по ячейкам общего bbox группы, а не по ячейкам каждого бокса.
+    since — боксы с индексом < since пропускаются (уже проверены вызывающим).
+    """
+    if not aabbs or len(self.minX) <= since:
+      return -1
+
+    gx0 = min(a.minX for a in aabbs)
+    gx1 = max(a.maxX for a in aabbs)
+    gz0 = min(a.minZ for a in aabbs)
+    gz1 = max(a.maxZ for a in aabbs)
+    inv = 1.0 / self.cell
+    ix0, ix1 = math.floor(gx0 * inv), math.floor(gx1 * inv)
+    iz0, iz1 = math.floor(gz0 * inv), math.floor(gz1 * inv)
+
+    cells = self.cells
+    near = set()
+    for ix in range(ix0, ix1 + 1):
+      for iz in range(iz0, iz1 + 1):
+        bucket = cells.get((ix, iz))
+        if bucket:
+          near.update(bucket)
+    if not near:
+      return -1
+
+    minX, maxX = self.minX, self.maxX
+    minY, maxY = self.minY, self.maxY
+    minZ, maxZ = self.minZ, self.maxZ
+    near_rows = [(minX[i], maxX[i], minY[i], maxY[i], minZ[i], maxZ[i]) for i in near if i >= since]
+
+    for k, (ax0, ax1, ay0, ay1, az0, az1) in enumerate(aabbs):
+      for bx0, bx1, by0, by1, bz0, bz1 in near_rows:
+        if ax1 <= bx0 + eps or ax0 >= bx1 - eps:
+          continue
+        if ay1 <= by0 + eps or ay0 >= by1 - eps:
+          continue
+        if az1 <= bz0 + eps or az0 >= bz1 - eps:
+          continue
+        return k
+    return -1
@@ -1,47 +1,53 @@
 # scoring/coeff.py
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
+from catalogs.vehicles import vehicle_capacity
 from domain.types import Item, ModeDecision, Vehicle
 from settings import SETTINGS
 
 
-def detect_mode(items: List[Item], vehicle: Vehicle) -> ModeDecision:
+ItemColumns = Tuple[List[float], List[float], List[float]]  # (weights, volumes, ratios)
+
+
+def item_columns(items: List[Item]) -> ItemColumns:
+  """
+  Колонки (weights, volumes, ratios) по items.
+  Item приходят из normalize_pallet уже с float >= 0 и ratio > 0, объём — Item.volumeM3.
+  """
+  weights = [i.weight for i in items]
+  volumes = [i.volumeM3 for i in items]
+  ratios = [i.ratio for i in items]
+  return weights, volumes, ratios
+
+
+def detect_mode(items: List[Item], vehicle: Vehicle, columns: Optional[ItemColumns] = None) -> ModeDecision:
+  """
+  columns — готовые item_columns(items), если они уже есть (их же потом берёт precompute_k).
+  """
   eps = float(SETTINGS.EPS)
 
   if not items:
     return ModeDecision("mixed", 0.0, 0.0, 0.0, 0.5)
 
-  total_weight = 0.0
-  total_volume = 0.0
-  total_floor_demand = 0.0  # в "стандартных паллетоместах"
-
-  for i in items:
-    w = max(0.0, float(i.width))
-    l = max(0.0, float(i.length))
-    h = max(0.0, float(i.height))
-
-    total_weight += max(0.0, float(i.weight))
-    total_volume += w * l * h
+  weights, volumes, ratios = columns if columns is not None else item_columns(items)
 
-    # ratio = floor demand (паллетомест по полу), увеличивает давление на пол
-    r = float(i.ratio) if i.ratio and float(i.ratio) > 0 else 1.0
-    total_floor_demand += r
+  total_weight = sum(weights)
+  total_volume = sum(volumes)
+  # ratio = floor demand (паллетомест по полу), увеличивает давление на пол
+  total_floor_demand = sum(ratios)  # в "стандартных паллетоместах"
 
   payload_max = vehicle.get("payloadMaxKg")
   weight_capacity = float(payload_max) if payload_max is not None else max(total_weight, 1.0)
 
-  fill_floor = float(vehicle.get("fillFactorFloor", SETTINGS.FILL_FACTOR_FLOOR_DEFAULT))
-  fill_vol = float(vehicle.get("fillFactorVolume", SETTINGS.FILL_FACTOR_VOLUME_DEFAULT))
-
   # floor_capacity тут исторически считался в м², но теперь total_floor_demand в "паллетоместах".
   # Чтобы не ломать модель, считаем "ёмкость пола" тоже в паллетоместах:
   # 1 паллетоместо = 1.0 м² (как ты задал для fallback ratio).
-  floor_capacity_m2 = (float(vehicle["innerWidth"]) * float(vehicle["innerLength"])) * fill_floor
-  floor_capacity = floor_capacity_m2 / 1.0
+  cap = vehicle_capacity(vehicle)
+  floor_capacity = cap.floor_capacity_m2 / 1.0
 
-  vol_capacity = (float(vehicle["innerWidth"]) * float(vehicle["innerLength"]) * float(vehicle["innerHeight"])) * fill_vol
+  vol_capacity = cap.vol_capacity_m3
 
   weight_pressure = total_weight / max(weight_capacity, eps)
   floor_pressure = total_floor_demand / max(floor_capacity, eps)
@@ -61,17 +67,37 @@ def detect_mode(items: List[Item], vehicle: Vehicle) -> ModeDecision:
 
 
 def compute_k(item: Item, mode: ModeDecision) -> float:
-  # ratio = floor demand => повышает "ценность" (приоритет) груза
-  r = float(item.ratio) if item.ratio and float(item.ratio) > 0 else 1.0
-
-  w = max(0.0, float(item.weight))
-  vol = max(0.0, float(item.width)) * max(0.0, float(item.length)) * max(0.0, float(item.height))
-
-  if mode.mode == "weight":
-    return w * r
-
-  if mode.mode == "volume":
-    return vol * r
-
-  alpha = float(mode.alpha) if mode.alpha is not None else 0.5
-  return alpha * (w * r) + (1.0 - alpha) * (vol * r)
+  # ratio = floor demand => повышает "ценность" (приоритет) груза;
+  # поля уже нормализованы в normalize_pallet (float, >= 0, ratio > 0)
+  return compute_k_from(item.weight, item.volumeM3, item.ratio, mode)
+
+
+def compute_k_from(w: float, vol: float, r: float, mode: ModeDecision) -> float:
+  """
+  compute_k по уже готовым (вес, объём, ratio) — например, из item_columns().
+  Без ветки по mode: alpha_effective = 1.0 (weight) / 0.0 (volume) / alpha (mixed),
+  при 1.0/0.0 формула даёт ровно w*r / vol*r.
+  """
+  a = mode.alpha_effective
+  return a * (w * r) + (1.0 - a) * (vol * r)
+
+
+def precompute_k(items: List[Item], mode: ModeDecision, columns: Optional[ItemColumns] = None) -> Dict[str, float]:
+  """
+  K по id паллеты: зависит только от (item, mode), а не от геометрии кандидата,
+  поэтому считается один раз на план, а score_candidate только читает словарь.
+  """
+  weights, volumes, ratios = columns if columns is not None else item_columns(items)
+  return {
+    it.id: compute_k_from(w, vol, r, mode)
+    for it, w, vol, r in zip(items, weights, volumes, ratios)
+  }
+
+
+def detect_mode_and_k(items: List[Item], vehicle: Vehicle) -> Tuple[ModeDecision, Dict[str, float]]:
+  """
+  detect_mode + precompute_k на одних и тех же колонках: по items проходим один раз.
+  """
+  columns = item_columns(items)
+  mode = detect_mode(items, vehicle, columns=columns)
+  return mode, precompute_k(items, mode, columns=columns)
@@ -4,7 +4,6 @@ from __future__ import annotations
 from typing import Tuple
 
 from domain.types import Candidate, ModeDecision
-from scoring.coeff import compute_k
 
 
 def score_candidate(state, candidate: Candidate, mode: ModeDecision) -> Tuple:
@@ -15,13 +14,13 @@ def score_candidate(state, candidate: Candidate, mode: ModeDecision) -> Tuple:
   3) used_area (внутри прямоугольника пола) — proxy против фрагментации
   4) reserved (0.0) — оставляем компоненту для совместимости с packer/_apply_policy_to_score
   """
-  item = state.items_by_id[candidate["itemId"]]
-  k = compute_k(item, mode)
+  # K от кандидата не зависит: берём из state.k_by_id (precompute_k на старте плана)
+  k = state.k_by_id[candidate.itemId]
 
-  used_area = float(candidate["dx"]) * float(candidate["dz"])
+  used_area = candidate.area
 
   # policy теперь добавляется только в solver/packer.py через _apply_policy_to_score()
-  return (1, float(k), float(used_area), 0.0)
+  return (1, k, used_area, 0.0)
 
 
 
@@ -45,10 +44,10 @@ def score_candidate(state, candidate: Candidate, mode: ModeDecision) -> Tuple:
   3) used_area (внутри прямоугольника пола) — proxy против фрагментации
   4) policy_bonus_minus_penalty
 
-  item = state.items_by_id[candidate["itemId"]]
+  item = state.items_by_id[candidate.itemId]
   k = compute_k(item, mode)
 
-  used_area = float(candidate["dx"]) * float(candidate["dz"])
+  used_area = float(candidate.dx) * float(candidate.dz)
 
   pol = evaluate_candidate_policy(item, candidate, state.vehicle, mode, allow_hard_rules=False)
   policy_term = float(pol.zone_bonus) - float(pol.zone_penalty)
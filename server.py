@@ -1,16 +1,22 @@
 # server.py
 from __future__ import annotations
 
-import json
+import gc
 import os
 import re
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
+import orjson
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import create_engine
 
 from settings import DATABASE_URL
@@ -24,7 +30,23 @@ load_dotenv()
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
-app = FastAPI(title="Packman Load Plan API", version="0.3.0")
+# -------------------------
+# GC (процесс целиком)
+# -------------------------
+# packer создаёт тысячи короткоживущих Candidate/AABB без циклов, и частые сборки
+# поколения 0 заметны по времени. GC — глобальный на процесс, а solve() идёт в пуле потоков,
+# поэтому не выключаем его вокруг solve(), а один раз на старте поднимаем порог поколения 0.
+# 0 (по умолчанию) — настройки GC не трогаем.
+GC_GEN0_THRESHOLD = int(os.getenv("GC_GEN0_THRESHOLD", "0"))
+
+if GC_GEN0_THRESHOLD > 0:
+  # объекты, созданные при импорте (модули, app, engine), в сборки больше не попадают
+  gc.freeze()
+  _gc_gen0, _gc_gen1, _gc_gen2 = gc.get_threshold()
+  gc.set_threshold(max(GC_GEN0_THRESHOLD, _gc_gen0), _gc_gen1, _gc_gen2)
+
+# ответы сериализует orjson: payload плана (placed/unplaced/debug) большой
+app = FastAPI(title="Packman Load Plan API", version="0.3.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
   CORSMiddleware,
@@ -45,6 +67,11 @@ DEBUG_RETURN_PATH = os.getenv("DEBUG_RETURN_PATH", "0") == "1"
 DebugLogFn = Callable[[str, Dict[str, Any]], None]
 
 
+def _new_run_id() -> str:
+  # старшие 40 бит uuid4 — те же 10 hex-символов, что hex[:10], без строки на 32 символа
+  return f"{uuid.uuid4().int >> 88:010x}"
+
+
 def _ts_name_utc() -> str:
   return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 
@@ -54,21 +81,31 @@ def _safe_fs_name(s: str) -> str:
   return s[:120] if len(s) > 120 else s
 
 
-def _make_file_logger(run_id: str, task_id: str) -> tuple[DebugLogFn, str]:
+def _make_file_logger(run_id: str, task_id: str) -> tuple[DebugLogFn, Callable[[], None], str]:
+  """
+  JSONL-лог на запрос: файл открывается один раз (буферизованно),
+  а не на каждое событие; close() обязательно звать в finally — он и сбрасывает буфер.
+  """
   os.makedirs(DEBUG_DIR, exist_ok=True)
   fname = f"{_ts_name_utc()}__{_safe_fs_name(task_id)}__{run_id}.jsonl"
   path = os.path.join(DEBUG_DIR, fname)
 
+  f = open(path, "ab", buffering=1 << 16)
+
   def log(evt: str, payload: Dict[str, Any]) -> None:
     rec = {
-      "ts": datetime.now(timezone.utc).isoformat(),
+      # unix-время в нс (UTC): int вместо isoformat() на каждое событие
+      "ts": time.time_ns(),
       "evt": evt,
       "payload": payload,
     }
-    with open(path, "a", encoding="utf-8") as f:
-      f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    # orjson пишет UTF-8 как есть (аналог ensure_ascii=False); ключи-не-строки приводит к str
+    f.write(orjson.dumps(rec, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
+
+  def close() -> None:
+    f.close()
 
-  return log, path
+  return log, close, path
 
 
 # -------------------------
@@ -81,17 +118,51 @@ def health() -> Dict[str, Any]:
 
 
 # -------------------------
-# Main endpoint
+# Plan (общий обработчик) + короткий TTL-кеш по task_id
 # -------------------------
+# viewer часто опрашивает один и тот же task_id: в пределах TTL отдаём готовый payload,
+# а одновременные запросы на один task_id ждут один и тот же solve.
+# По умолчанию выключен (0): в пределах TTL изменения задачи в БД не видны, включать явно.
+# При DEBUG_ENABLED кеш не используется: каждый запрос должен писать свой debug-лог и runId.
+
+PLAN_CACHE_TTL_S = float(os.getenv("PLAN_CACHE_TTL_S", "0"))
+PLAN_CACHE_MAXSIZE = int(os.getenv("PLAN_CACHE_MAXSIZE", "128"))
+
+_plan_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# solve, который сейчас идёт по task_id: остальные запросы ждут его Future (и его ошибку)
+_plan_inflight: Dict[str, Future] = {}
+# один lock на кеш и _plan_inflight: проверка/запись кеша и снятие inflight — атомарно
+_plan_cache_lock = threading.Lock()
+
+
+def _plan_cache_get_locked(task_id: str) -> Optional[Dict[str, Any]]:
+  # вызывать под _plan_cache_lock
+  hit = _plan_cache.get(task_id)
+  if hit is None:
+    return None
+  expires_at, payload = hit
+  if expires_at <= time.monotonic():
+    del _plan_cache[task_id]
+    return None
+  return payload
+
+
+def _plan_cache_put_locked(task_id: str, payload: Dict[str, Any]) -> None:
+  # вызывать под _plan_cache_lock
+  _plan_cache[task_id] = (time.monotonic() + PLAN_CACHE_TTL_S, payload)
+  _plan_cache.move_to_end(task_id)
+  while len(_plan_cache) > PLAN_CACHE_MAXSIZE:
+    _plan_cache.popitem(last=False)
 
-@app.get("/plan/{task_id}")
-def get_plan(task_id: str) -> Dict[str, Any]:
-  run_id = uuid.uuid4().hex[:10]
+
+def _build_plan(task_id: str) -> Dict[str, Any]:
+  run_id = _new_run_id()
 
   debug_log: Optional[DebugLogFn] = None
+  debug_close: Optional[Callable[[], None]] = None
   debug_path: Optional[str] = None
   if DEBUG_ENABLED:
-    debug_log, debug_path = _make_file_logger(run_id, task_id)
+    debug_log, debug_close, debug_path = _make_file_logger(run_id, task_id)
 
   try:
     payload = pack_task_to_viewer_json(engine=engine, task_id=task_id, debug_log=debug_log)
@@ -99,6 +170,9 @@ def get_plan(task_id: str) -> Dict[str, Any]:
     if debug_log:
       debug_log("server_error", {"taskId": task_id, "error": f"{type(exc).__name__}: {exc}"})
     raise HTTPException(status_code=500, detail=f"{type(exc).__name__}: {exc}")
+  finally:
+    if debug_close:
+      debug_close()
 
   if DEBUG_RETURN_PATH and debug_path:
     payload["_debug"] = {"runId": run_id, "path": debug_path}
@@ -106,24 +180,52 @@ def get_plan(task_id: str) -> Dict[str, Any]:
   return payload
 
 
-@app.get("/api/load-plan/by-task/{task_id}")
-def get_plan_compat(task_id: str) -> Dict[str, Any]:
-  # полностью тот же обработчик, что и /plan/{task_id}, было лень искать где viewer ходит не в ту апи
-  run_id = uuid.uuid4().hex[:10]
+def _handle_plan(task_id: str) -> Dict[str, Any]:
+  if PLAN_CACHE_TTL_S <= 0 or DEBUG_ENABLED:
+    return _build_plan(task_id)
 
-  debug_log: Optional[DebugLogFn] = None
-  debug_path: Optional[str] = None
-  if DEBUG_ENABLED:
-    debug_log, debug_path = _make_file_logger(run_id, task_id)
+  with _plan_cache_lock:
+    payload = _plan_cache_get_locked(task_id)
+    if payload is not None:
+      return payload
+    future = _plan_inflight.get(task_id)
+    owner = future is None
+    if owner:
+      future = Future()
+      _plan_inflight[task_id] = future
+
+  if not owner:
+    # solve уже идёт: ждём его результат; ошибка (HTTPException) пробрасывается всем ждущим
+    return future.result()
 
   try:
-    payload = pack_task_to_viewer_json(engine=engine, task_id=task_id, debug_log=debug_log)
-  except Exception as exc:
-    if debug_log:
-      debug_log("server_error", {"taskId": task_id, "error": f"{type(exc).__name__}: {exc}"})
-    raise HTTPException(status_code=500, detail=f"{type(exc).__name__}: {exc}")
+    payload = _build_plan(task_id)
+  except BaseException as exc:
+    # ошибки не кешируем: следующий запрос после этого solve начнёт новый
+    with _plan_cache_lock:
+      _plan_inflight.pop(task_id, None)
+    future.set_exception(exc)
+    raise
+
+  with _plan_cache_lock:
+    _plan_cache_put_locked(task_id, payload)
+    _plan_inflight.pop(task_id, None)
+  future.set_result(payload)
+  return payload
 
-  if DEBUG_RETURN_PATH and debug_path:
-    payload["_debug"] = {"runId": run_id, "path": debug_path}
 
-  return payload
+# -------------------------
+# Main endpoint
+# -------------------------
+
+# Response отдаём сами: иначе FastAPI прогонит dict плана через jsonable_encoder до orjson
+
+@app.get("/plan/{task_id}")
+def get_plan(task_id: str) -> ORJSONResponse:
+  return ORJSONResponse(_handle_plan(task_id))
+
+
+@app.get("/api/load-plan/by-task/{task_id}")
+def get_plan_compat(task_id: str) -> ORJSONResponse:
+  # тот же обработчик, что и /plan/{task_id}: viewer ходит и сюда
+  return ORJSONResponse(_handle_plan(task_id))
@@ -2,23 +2,34 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-from catalogs.packaging_catalog import TARA_CATALOG_CM
+from catalogs.packaging_catalog import TARA_CATALOG_CM, TaraSpec
 from domain.types import Item
 
 
+# кириллическая Х/х -> латинская X одной таблицей (обе буквы, т.к. translate идёт до upper())
+_CYRILLIC_X = str.maketrans({"Х": "X", "х": "X"})
+
+
 def normalize_code_key(s: Optional[str]) -> str:
   if not s:
     return ""
-  return s.strip().upper().replace("Х", "X")
+  return s.strip().translate(_CYRILLIC_X).upper()
 
 
-def lookup_tara_by_code(code: Optional[str]) -> Optional[Dict[str, float]]:
-  k = normalize_code_key(code)
-  if not k:
-    return None
-  return TARA_CATALOG_CM.get(k)
+def lookup_tara_by_code(code: Optional[str]) -> Optional[TaraSpec]:
+  return _lookup_tara_by_key(normalize_code_key(code))
+
+
+def _lookup_tara_by_key(key: str) -> Optional[TaraSpec]:
+  # key — уже normalize_code_key(...)
+  return TARA_CATALOG_CM.get(key) if key else None
+
+
+# компилируются один раз на модуль; PAL проверяется первым — он и встречается чаще
+_PAL_RE = re.compile(r"PAL\s*(\d+)\s*[XХ]\s*(\d+)")
+_BOX_RE = re.compile(r"BOX\s*(\d+)\s*[XХ]\s*(\d+)\s*[XХ]\s*(\d+)")
 
 
 def parse_pallet_type(pallet_type: str) -> Optional[Tuple[float, float, Optional[float]]]:
@@ -26,13 +37,13 @@ def parse_pallet_type(pallet_type: str) -> Optional[Tuple[float, float, Optional
     return None
   s = pallet_type.strip().upper()
 
-  m = re.search(r"PAL\s*(\d+)\s*[XХ]\s*(\d+)", s)
+  m = _PAL_RE.search(s)
   if m:
     w_cm = int(m.group(1))
     l_cm = int(m.group(2))
     return (w_cm / 100.0, l_cm / 100.0, None)
 
-  m = re.search(r"BOX\s*(\d+)\s*[XХ]\s*(\d+)\s*[XХ]\s*(\d+)", s)
+  m = _BOX_RE.search(s)
   if m:
     w_cm = int(m.group(1))
     l_cm = int(m.group(2))
@@ -43,7 +54,10 @@ def parse_pallet_type(pallet_type: str) -> Optional[Tuple[float, float, Optional
 
 
 def get_stack_flags(pallet_type: Optional[str]) -> Dict[str, bool]:
-  key = normalize_code_key(pallet_type)
+  return _stack_flags_by_key(normalize_code_key(pallet_type))
+
+
+def _stack_flags_by_key(key: str) -> Dict[str, bool]:
   RULES: Dict[str, Dict[str, bool]] = {}
   return RULES.get(key, {"can_be_base": True, "can_be_stacked": True})
 
@@ -51,6 +65,9 @@ def get_stack_flags(pallet_type: Optional[str]) -> Dict[str, bool]:
 def _safe_float(v: Any) -> Optional[float]:
   if v is None:
     return None
+  # быстрый путь: из БД чаще всего уже float — без float() и try
+  if type(v) is float:
+    return v
   try:
     return float(v)
   except Exception:
@@ -90,23 +107,31 @@ def _normalize_height_cm(v: Any) -> Tuple[Optional[float], Optional[str]]:
   return h, None
 
 
-def normalize_pallet(row: Dict[str, Any]) -> Item:
-  # drop_container_id == sscc (главный источник)
-  sscc = row.get("drop_container_id") or row.get("sscc") or row.get("id")
-  pallet_id = str(sscc) if sscc is not None else "UNKNOWN"
+class _PalletTypeProfile(NamedTuple):
+  """
+  Всё, что в normalize_pallet зависит только от pallet_type:
+  в задаче типов единицы, а строк — тысячи, поэтому normalize_pallets считает это один раз на тип.
+  """
+  key: str
+  tara: Optional[TaraSpec]
+  w_m: float
+  l_m: float
+  h_from_type: Optional[float]
+  status: str
+  flags: Dict[str, bool]
 
-  pallet_type_raw = row.get("pallet_type") or ""
-  pallet_type_key = normalize_code_key(pallet_type_raw)
 
-  tara = lookup_tara_by_code(pallet_type_raw)
+def _pallet_type_profile(pallet_type_raw: str) -> _PalletTypeProfile:
+  # ключ нормализуем один раз: tara и flags берут его же
+  key = normalize_code_key(pallet_type_raw)
+  tara = _lookup_tara_by_key(key)
 
-  status = "ok"
   h_from_type: Optional[float] = None
 
   # --- dims
   if tara:
-    w_m = float(tara["width"]) / 100.0
-    l_m = float(tara["length"]) / 100.0
+    w_m = tara.width / 100.0
+    l_m = tara.length / 100.0
     status = "dims_from_tara_catalog"
   else:
     parsed = parse_pallet_type(pallet_type_raw)
@@ -117,6 +142,58 @@ def normalize_pallet(row: Dict[str, Any]) -> Item:
       w_m, l_m, h_from_type = 0.80, 1.20, None
       status = "unknown_pallet_type"
 
+  return _PalletTypeProfile(
+    key=key,
+    tara=tara,
+    w_m=w_m,
+    l_m=l_m,
+    h_from_type=h_from_type,
+    status=status,
+    # --- stack flags (fallback)
+    flags=_stack_flags_by_key(key),
+  )
+
+
+def normalize_pallet(row: Dict[str, Any]) -> Item:
+  pallet_type_raw = row.get("pallet_type") or ""
+  return _normalize_row(row, _pallet_type_profile(pallet_type_raw))
+
+
+def normalize_pallets(
+  rows: Iterable[Dict[str, Any]],
+  on_error: Optional[Callable[[Dict[str, Any], Exception], None]] = None,
+) -> List[Item]:
+  """
+  normalize_pallet по всем строкам задачи: разбор pallet_type (tara/regex/flags) кешируется по типу.
+  Строка, на которой normalize упал, пропускается; on_error(row, exc) — чтобы вызывающий её залогировал.
+  """
+  profiles: Dict[Any, _PalletTypeProfile] = {}
+  items: List[Item] = []
+  for row in rows:
+    try:
+      pallet_type_raw = row.get("pallet_type") or ""
+      profile = profiles.get(pallet_type_raw)
+      if profile is None:
+        profile = _pallet_type_profile(pallet_type_raw)
+        profiles[pallet_type_raw] = profile
+      items.append(_normalize_row(row, profile))
+    except Exception as exc:
+      if on_error is None:
+        raise
+      on_error(row, exc)
+  return items
+
+
+def _normalize_row(row: Dict[str, Any], profile: _PalletTypeProfile) -> Item:
+  # drop_container_id == sscc (главный источник)
+  sscc = row.get("drop_container_id") or row.get("sscc") or row.get("id")
+  pallet_id = str(sscc) if sscc is not None else "UNKNOWN"
+
+  pallet_type_key = profile.key
+  tara = profile.tara
+  w_m, l_m, h_from_type = profile.w_m, profile.l_m, profile.h_from_type
+  status = profile.status
+
   # --- numeric inputs
   weight = _safe_float(row.get("weight"))
   volume = _safe_float(row.get("volume"))
@@ -150,11 +227,10 @@ def normalize_pallet(row: Dict[str, Any]) -> Item:
       h_m = 1.20
       status = f"{status}|no_height_no_volume"
 
-  # --- stack flags (fallback)
-  flags = get_stack_flags(pallet_type_raw)
+  flags = profile.flags
 
   # --- tare weight fallback
-  tare_weight = _safe_float(tara.get("weight")) if tara else None
+  tare_weight = tara.weight if tara else None
   if (weight is None) and (tare_weight is not None):
     weight = float(tare_weight)
 
@@ -172,15 +248,16 @@ def normalize_pallet(row: Dict[str, Any]) -> Item:
   provider_id = row.get("provider_id")
   provider_name = row.get("provider_name")
 
+  # Item отдаём уже с float >= 0: scoring/solver не перепроверяют поля на каждом кандидате
   return Item(
     id=pallet_id,
 
-    width=float(w_m),
-    length=float(l_m),
-    height=float(h_m),
+    width=max(0.0, float(w_m)),
+    length=max(0.0, float(l_m)),
+    height=max(0.0, float(h_m)),
 
     # ВАЖНО: Item.weight должен быть float (solver), поэтому если None — ставим 0.0
-    weight=float(weight) if weight is not None else 0.0,
+    weight=max(0.0, float(weight)) if weight is not None else 0.0,
 
     # ratio == floor demand (паллетомест по полу)
     ratio=float(ratio),
@@ -5,12 +5,11 @@ from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy.engine import Engine
 
-from catalogs.vehicles import get_vehicle
-from domain.types import Item, PlanResult
+from catalogs.vehicles import get_vehicle, vehicle_capacity
+from domain.types import Item, ModeDecision, PlanResult, aabb_to_dict
 from services.fetch import fetch_task_rows
-from services.normalize import normalize_pallet
+from services.normalize import normalize_pallets
 from solver.entrypoint import solve
-from settings import SETTINGS
 
 
 DebugLogFn = Optional[Callable[[str, Dict[str, Any]], None]]
@@ -37,7 +36,7 @@ def _placed_item_to_viewer(p) -> Dict[str, Any]:
     "width": it.width,
     "length": it.length,
     "ratio": it.ratio,
-    "volume": it.volume(),
+    "volume": it.volumeM3,  # = it.volume(), без вызова метода
 
     "status": p.status,
 
@@ -47,7 +46,7 @@ def _placed_item_to_viewer(p) -> Dict[str, Any]:
     "rotationY": p.rotationY,
 
     "dims": {"dx": p.dims[0], "dy": p.dims[1], "dz": p.dims[2]},
-    "aabb": p.aabb,
+    "aabb": aabb_to_dict(p.aabb),
     "corner": p.corner,
   }
 
@@ -68,36 +67,35 @@ def _unplaced_item_to_viewer(it: Item) -> Dict[str, Any]:
     "width": it.width,
     "length": it.length,
     "ratio": it.ratio,
-    "volume": it.volume(),
+    "volume": it.volumeM3,  # = it.volume(), без вызова метода
 
     "status": it.status if it.status else "unplaced",
   }
 
 
 def _compute_utilization(plan: PlanResult) -> Dict[str, Any]:
-  v = plan.vehicle
+  cap = vehicle_capacity(plan.vehicle)
 
   # геометрическая площадь/объём кузова
-  floor_total_m2 = float(v["innerWidth"]) * float(v["innerLength"])
-  vol_total_m3 = floor_total_m2 * float(v["innerHeight"])
+  floor_total_m2 = cap.floor_area_m2
+  vol_total_m3 = cap.volume_m3
 
   used_floor_m2 = 0.0
   used_vol_m3 = 0.0
 
   # спрос пола (ratio): паллетоместа по полу
   # стандарт: 1 паллетоместо = 1.0 м² (как у тебя в fallback ratio)
-  fill_floor = float(v.get("fillFactorFloor", SETTINGS.FILL_FACTOR_FLOOR_DEFAULT))
-  floor_capacity_demand = (floor_total_m2 * fill_floor) / 1.0
+  fill_floor = cap.fill_floor
+  floor_capacity_demand = cap.floor_capacity_m2 / 1.0
 
+  # один проход по placed на локальных float: dims уже float (из Candidate),
+  # ratio > 0 гарантирует normalize_pallet
   used_floor_demand = 0.0
   for p in plan.placed:
     dx, dy, dz = p.dims
-    used_floor_m2 += float(dx) * float(dz)
-    used_vol_m3 += float(dx) * float(dy) * float(dz)
-
-    it = p.item
-    r = float(it.ratio) if getattr(it, "ratio", None) and float(it.ratio) > 0 else 1.0
-    used_floor_demand += r
+    used_floor_m2 += dx * dz
+    used_vol_m3 += dx * dy * dz
+    used_floor_demand += p.item.ratio
 
   return {
     "floor": {
@@ -183,8 +181,18 @@ def pack_task_to_viewer_json(
 
   if not rows:
     # без строк вообще — считаем пустым планом
+    # solve() тут не нужен: пустой план собираем сразу (mode — как detect_mode([]))
     vehicle = get_vehicle(None)
-    empty_plan = solve([], vehicle, task_id=task_id, transport_type="UNKNOWN", debug_log=debug_log)
+    empty_plan = PlanResult(
+      taskId=task_id,
+      transportType="UNKNOWN",
+      vehicle=vehicle,
+      mode=ModeDecision("mixed", 0.0, 0.0, 0.0, 0.5),
+      placed=[],
+      unplaced=[],
+      loads=None,
+      debug=[],
+    )
     return plan_to_viewer_json(empty_plan)
 
   # 2) transport type + vehicle
@@ -192,16 +200,15 @@ def pack_task_to_viewer_json(
   vehicle = get_vehicle(transport_type)
 
   # 3) normalize
-  items: List[Item] = []
   bad = 0
-  for r in rows:
-    try:
-      it = normalize_pallet(r)
-      items.append(it)
-    except Exception as exc:
-      bad += 1
-      if debug_log:
-        debug_log("normalize_failed", {"taskId": task_id, "row": r, "error": f"{type(exc).__name__}: {exc}"})
+
+  def _on_normalize_error(r: Dict[str, Any], exc: Exception) -> None:
+    nonlocal bad
+    bad += 1
+    if debug_log:
+      debug_log("normalize_failed", {"taskId": task_id, "row": r, "error": f"{type(exc).__name__}: {exc}"})
+
+  items: List[Item] = normalize_pallets(rows, on_error=_on_normalize_error)
 
   if debug_log:
     debug_log("normalize_done", {"taskId": task_id, "items": len(items), "bad": bad})
@@ -1,60 +1,180 @@
 # solver/packer.py
 from __future__ import annotations
 
-from typing import Callable, Dict, List, Optional, Tuple
+import math
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
 
 from catalogs.plan_state import PlanState
 from candidates.generators import generate_floor_candidates
-from domain.types import Candidate, Item, PlanResult, Vehicle
-from scoring.coeff import detect_mode
+from debug.events import NOOP_LOG
+from domain.types import AABB, Candidate, Item, ModeDecision, PlanResult, Vehicle
+from scoring.coeff import detect_mode_and_k
 from scoring.objective import score_candidate
 from settings import SETTINGS
-from constraints.policies import sort_key_for_queue, evaluate_candidate_policy
-from constraints.bounds import check_collision, check_oob
-from constraints.axles import compute_loads, check_loads
-from catalogs.placed_item import placed_from_candidate
-from geometry.aabb import aabb_intersects
+from constraints.policies import (
+  sort_key_for_queue, evaluate_candidate_policy, evaluate_candidates_policy,
+  policy_coeffs, mode_handler, ModeHandler, PolicyCoeffs,
+)
+from constraints.axles import compute_loads_delta, check_loads, REASON_AXLE_A, REASON_AXLE_B, REASON_PAYLOAD
+from constraints.bounds import REASON_COLLISION, REASON_OOB
+from geometry.aabb import aabb_intersects, aabb_union_batch, oob_mask_batch
+from geometry.spatial_hash import SpatialHash, cell_for_sides
 
 
 DebugLogFn = Optional[Callable[[str, dict], None]]
 
+REASON_INTERNAL_COLLISION = "pattern_internal_collision"
 
-def _group_pattern_candidates(cands: List[Candidate]) -> Dict[str, List[Candidate]]:
-  groups: Dict[str, List[Candidate]] = {}
+
+class PackerConsts(NamedTuple):
+  # настройки packer-а, снятые с SETTINGS один раз на план (а не getattr в горячих циклах)
+  policy_score_w: float
+  pack_density_w: float
+  pack_touch_w: float
+  pack_slack_w: float
+  top_n_window: int
+  pattern_reject_log_limit: int
+
+
+def packer_consts(settings=SETTINGS) -> PackerConsts:
+  return PackerConsts(
+    policy_score_w=float(getattr(settings, "POLICY_SCORE_WEIGHT", 1.0)),
+    pack_density_w=float(getattr(settings, "PACK_DENSITY_W", 10.0)),
+    pack_touch_w=float(getattr(settings, "PACK_TOUCH_W", 0.6)),
+    pack_slack_w=float(getattr(settings, "PACK_SLACK_W", 1.5)),
+    top_n_window=settings.TOP_N_WINDOW,
+    pattern_reject_log_limit=int(getattr(settings, "PATTERN_REJECT_LOG_LIMIT", 25)),
+  )
+
+
+def _group_pattern_candidates(cands: List[Candidate]) -> Dict[int, List[Candidate]]:
+  groups: Dict[int, List[Candidate]] = {}
   for c in cands:
-    pid = (c.get("meta") or {}).get("patternId")
-    if not pid:
+    pid = c.patternId
+    if pid is None:
       continue
     groups.setdefault(pid, []).append(c)
   return groups
 
 
-def _can_commit_group(state: PlanState, group: List[Candidate]) -> Tuple[bool, List[str]]:
-  reasons: List[str] = []
+def _group_has_internal_overlap(group: List[Candidate]) -> bool:
+  """
+  Есть ли в группе пара пересекающихся AABB (aabb_intersects).
+  Sweep по X: боксы по возрастанию minX, активными держим только те, чей maxX
+  правее текущего minX, — с остальными X уже не сойдётся ни у текущего, ни у следующих.
+  Пара проверяется тем же вызовом, что и раньше: aabb_intersects(позже в группе, раньше в группе).
+  """
+  order = sorted(range(len(group)), key=lambda k: group[k].aabb.minX)
+  active: List[int] = []
+  for i in order:
+    b = group[i].aabb
+    bx0 = b.minX
+    active = [j for j in active if group[j].aabb.maxX > bx0]
+    for j in active:
+      if i > j:
+        hit = aabb_intersects(b, group[j].aabb)
+      else:
+        hit = aabb_intersects(group[j].aabb, b)
+      if hit:
+        return True
+    active.append(i)
+  return False
 
-  # 1) внутренняя коллизия группы
-  for i in range(len(group)):
-    for j in range(i):
-      if aabb_intersects(group[i]["aabb"], group[j]["aabb"]):
-        return (False, ["pattern_internal_collision"])
 
-  # 2) OOB + коллизии с уже placed
+def _first_oob(aabbs: List, vehicle: Vehicle) -> int:
+  # индекс первого бокса за пределами кузова, len(aabbs) — если таких нет
+  oob = oob_mask_batch(aabbs, vehicle)
+  return oob.index(True) if True in oob else len(aabbs)
+
+
+@dataclass(frozen=True)
+class PatternGeom:
+  """
+  Статика группы паттерна, зависящая только от раскладки (позиции/габариты + rect),
+  а не от паллет в слотах и не от уже поставленных: внутренняя коллизия, OOB, quality.
+  Кандидаты (и patternId) генерируются заново на каждой итерации, поэтому кеш —
+  по отпечатку раскладки (_pattern_geom_key), а не по patternId.
+  """
+  internal_ok: bool
+  first_oob: int
+  # общий bbox группы: если он не задевает PlanState.placed_union, коллизий с placed нет
+  union: AABB
+  quality: float
+  quality_dbg: Dict[str, float]
+  # верхняя граница score_pat: quality и used_area_sum от паллет не зависят,
+  # policy_sum и k_sum неизвестны до оценки -> +inf
+  score_bound: Tuple[int, float, float, float, float]
+
+
+PatternGeomKey = Tuple
+
+
+def _pattern_geom_key(group: List[Candidate]) -> PatternGeomKey:
+  return (group[0].rect,) + tuple((c.x, c.y, c.z, c.dx, c.dy, c.dz) for c in group)
+
+
+def _pattern_geom(group: List[Candidate], vehicle: Vehicle, consts: PackerConsts) -> PatternGeom:
+  quality, qdbg = _packing_quality(group, consts)
+  aabbs = [c.aabb for c in group]
+  # used_area_sum тем же сложением, что в _evaluate_group (score_candidate: c.area)
+  used_area_sum = 0.0
   for c in group:
-    ok, r = check_oob(c, state.vehicle)
-    if not ok:
-      return (False, r)
-    ok, r = check_collision(c, state.placed)
-    if not ok:
-      return (False, r)
+    used_area_sum += c.area
+  return PatternGeom(
+    internal_ok=not _group_has_internal_overlap(group),
+    first_oob=_first_oob(aabbs, vehicle),
+    union=aabb_union_batch(aabbs),
+    quality=quality,
+    quality_dbg=qdbg,
+    score_bound=(1, quality, used_area_sum, math.inf, math.inf),
+  )
+
+
+def _can_commit_group(
+  state: PlanState,
+  group: List[Candidate],
+  geom: Optional[PatternGeom] = None,
+  since: int = 0,
+) -> Tuple[bool, List[str]]:
+  """
+  geom — статика раскладки группы (_pattern_geom); без него считается тут же.
+  since — сколько первых placed уже проверено на коллизию с этой раскладкой (без пересечений).
+  """
+  reasons: List[str] = []
+
+  # 1) внутренняя коллизия группы
+  internal_ok = geom.internal_ok if geom is not None else not _group_has_internal_overlap(group)
+  if not internal_ok:
+    return (False, [REASON_INTERNAL_COLLISION])
+
+  # 2) OOB + коллизии с уже placed — пакетом на всю группу.
+  # Порядок причин как при поштучной проверке (oob, затем collision для каждой паллеты):
+  # коллизии ищем только среди паллет до первой вылезающей за кузов
+  aabbs = [c.aabb for c in group]
+  first_oob = geom.first_oob if geom is not None else _first_oob(aabbs, state.vehicle)
+  # префильтр: общий bbox группы мимо общего bbox placed => по сетке не идём
+  placed_union = state.placed_union
+  if placed_union is not None:
+    union = geom.union if geom is not None else aabb_union_batch(aabbs)
+    if aabb_intersects(union, placed_union) and state.placed_index.first_collision(aabbs[:first_oob], since=since) >= 0:
+      return (False, [REASON_COLLISION])
+  if first_oob < len(aabbs):
+    return (False, [REASON_OOB])
 
   # 3) Оси как жёсткий фильтр на итоговой постановке
-  tmp_placed = state.placed[:]
-  for c in group:
-    it = state.items_by_id[c["itemId"]]
-    tmp_placed.append(placed_from_candidate(c, item=it))
+  if not state.loads_limited:
+    return (True, [])
 
-  loads = compute_loads(tmp_placed, state.vehicle)
-  ok, r = check_loads(loads, state.vehicle)
+  # state.loads — итог по уже стоящим паллетам (копится в commit()), досуммируем только группу:
+  # O(группы), а не O(placed); порядок сложения как у полного пересчёта
+  items_by_id = state.items_by_id
+  group_weights = [float(items_by_id[c.itemId].weight) for c in group]
+  group_zs = [float(c.z) for c in group]
+
+  loads = compute_loads_delta(state.loads, group_weights, group_zs, state.vehicle, state.axles)
+  ok, r = check_loads(loads, state.vehicle, state.axles)
   if not ok:
     reasons.extend(r)
     return (False, reasons)
@@ -62,21 +182,53 @@ def _can_commit_group(state: PlanState, group: List[Candidate]) -> Tuple[bool, L
   return (True, [])
 
 
-def _apply_policy_to_score(sc, pol) -> Tuple[int, float, float, float]:
+def _apply_policy_to_score(sc, pol, w: float) -> Tuple[int, float, float, float]:
   """
   Политику добавляем в последнюю компоненту.
-  sc ожидается как (int, float, float, float)
+  sc ожидается как (int, float, float, float); w — PackerConsts.policy_score_w.
   """
   if sc is None or pol is None:
     return sc
-  w = float(getattr(SETTINGS, "POLICY_SCORE_WEIGHT", 1.0))
-  term = w * (float(pol.zone_bonus) - float(pol.zone_penalty))
-  return (int(sc[0]), float(sc[1]), float(sc[2]), float(sc[3]) + term)
+  return _apply_policy_terms(sc, pol.zone_bonus, pol.zone_penalty, w)
+
+
+def _apply_policy_terms(sc, bonus: float, penalty: float, w: float) -> Tuple[int, float, float, float]:
+  """
+  То же, что _apply_policy_to_score, но по голым (bonus, penalty) — для пакетной policy.
+  Типы компонент sc уже приведены в score_candidate, поэтому без int()/float() на каждого кандидата.
+  """
+  if sc is None:
+    return sc
+  term = w * (float(bonus) - float(penalty))
+  return (sc[0], sc[1], sc[2], sc[3] + term)
+
+
+# бакет по известным причинам; приоритет бакетов — как у разбора по подстрокам ниже
+_REASON_BUCKET: Dict[str, str] = {
+  REASON_INTERNAL_COLLISION: "internal_collision",
+  REASON_OOB: "oob",
+  REASON_COLLISION: "collision",
+  REASON_PAYLOAD: "axles",
+  REASON_AXLE_A: "axles",
+  REASON_AXLE_B: "axles",
+}
+_BUCKET_ORDER = ("internal_collision", "oob", "collision", "axles")
 
 
 def _pat_reason_bucket(reasons: List[str]) -> str:
   if not reasons:
     return "unknown"
+
+  # причины из constraints/packer — готовые константы: хватает поиска в dict
+  buckets = {_REASON_BUCKET.get(r) for r in reasons}
+  if None not in buckets:
+    if len(buckets) == 1:
+      return buckets.pop()
+    for b in _BUCKET_ORDER:
+      if b in buckets:
+        return b
+
+  # незнакомые строки — прежний разбор по подстрокам
   s = "|".join(str(x) for x in reasons).lower()
   if "pattern_internal_collision" in s:
     return "internal_collision"
@@ -89,13 +241,13 @@ def _pat_reason_bucket(reasons: List[str]) -> str:
   return "other"
 
 
-def _packing_quality(group: List[Candidate]) -> Tuple[float, Dict[str, float]]:
+def _packing_quality(group: List[Candidate], consts: PackerConsts) -> Tuple[float, Dict[str, float]]:
   """
   Геометрическая оценка для паттерна (антифрагментация).
 
   Метрики:
   - density = used_area / bbox_area (bbox по XZ, объединение AABB группы)
-  - slack = сумма зазоров bbox до границ free-rect (meta.rect)
+  - slack = сумма зазоров bbox до границ free-rect (candidate.rect)
   - touch_edges = сколько сторон bbox "касается" границ rect (0..4)
 
   quality = DENSITY_W*density + TOUCH_W*touch_edges - SLACK_W*slack
@@ -103,26 +255,21 @@ def _packing_quality(group: List[Candidate]) -> Tuple[float, Dict[str, float]]:
   if not group:
     return 0.0, {}
 
-  used = 0.0
-  minX = 1e18
-  maxX = -1e18
-  minZ = 1e18
-  maxZ = -1e18
-
-  for c in group:
-    used += float(c["dx"]) * float(c["dz"])
-    a = c["aabb"]
-    minX = min(minX, float(a["minX"]))
-    maxX = max(maxX, float(a["maxX"]))
-    minZ = min(minZ, float(a["minZ"]))
-    maxZ = max(maxZ, float(a["maxZ"]))
+  # свёртки встроенными min/max/sum по колонкам AABB (zip(*) = транспонирование),
+  # а не поэлементный цикл на Python
+  used = sum(c.area for c in group)
+  xs0, xs1, _, _, zs0, zs1 = zip(*(c.aabb for c in group))
+  minX = min(xs0)
+  maxX = max(xs1)
+  minZ = min(zs0)
+  maxZ = max(zs1)
 
   bbox_w = max(0.0, maxX - minX)
   bbox_l = max(0.0, maxZ - minZ)
   bbox_area = bbox_w * bbox_l
   density = (used / bbox_area) if bbox_area > 1e-9 else 0.0
 
-  rect = (group[0].get("meta") or {}).get("rect")
+  rect = group[0].rect
   slack = 0.0
   touch = 0.0
   if rect:
@@ -145,9 +292,9 @@ def _packing_quality(group: List[Candidate]) -> Tuple[float, Dict[str, float]]:
       t += 1
     touch = float(t)
 
-  DENSITY_W = float(getattr(SETTINGS, "PACK_DENSITY_W", 10.0))
-  TOUCH_W = float(getattr(SETTINGS, "PACK_TOUCH_W", 0.6))
-  SLACK_W = float(getattr(SETTINGS, "PACK_SLACK_W", 1.5))
+  DENSITY_W = consts.pack_density_w
+  TOUCH_W = consts.pack_touch_w
+  SLACK_W = consts.pack_slack_w
 
   quality = (DENSITY_W * density) + (TOUCH_W * touch) - (SLACK_W * slack)
 
@@ -162,17 +309,118 @@ def _packing_quality(group: List[Candidate]) -> Tuple[float, Dict[str, float]]:
   return float(quality), dbg
 
 
+class _PatternCtx(NamedTuple):
+  # всё, что нужно оценке группы паттерна помимо state; кеши общие на план
+  vehicle: Vehicle
+  mode: ModeDecision
+  consts: PackerConsts
+  pol_coeffs: PolicyCoeffs
+  pol_handler: ModeHandler
+  geoms: Dict[PatternGeomKey, PatternGeom]
+  collided: Set[PatternGeomKey]
+  # раскладка -> сколько первых placed с ней точно не пересекаются (проверено раньше)
+  clear_upto: Dict[PatternGeomKey, int]
+  unavailable: Set[str]
+
+
+class _GroupEval(NamedTuple):
+  reason: Optional[str]  # бакет отказа (как в pattern_reject_stats); None — группа годится
+  reasons: List[str]  # причины отказа; для not_available — id недостающих паллет
+  score: Optional[Tuple[int, float, float, float, float]] = None
+  quality_dbg: Optional[Dict[str, float]] = None
+
+
+def _pattern_rejected_payload(pid: int, group: List[Candidate], ev: _GroupEval) -> dict:
+  payload = {"patternId": pid, "reason": ev.reason}
+  if ev.reason == "not_available":
+    payload["missingItemIds"] = ev.reasons[:20]
+  else:
+    payload["reasons"] = ev.reasons[:20]
+  payload["groupSize"] = len(group)
+  return payload
+
+
+def _group_geom(group: List[Candidate], ctx: _PatternCtx) -> Tuple[PatternGeomKey, PatternGeom]:
+  geom_key = _pattern_geom_key(group)
+  geom = ctx.geoms.get(geom_key)
+  if geom is None:
+    geom = _pattern_geom(group, ctx.vehicle, ctx.consts)
+    ctx.geoms[geom_key] = geom
+  return geom_key, geom
+
+
+def _evaluate_group(
+  state: PlanState,
+  group: List[Candidate],
+  geom_key: PatternGeomKey,
+  geom: PatternGeom,
+  ctx: _PatternCtx,
+) -> _GroupEval:
+  """
+  Проверка и score одной группы паттерна. state не меняет, пополняет только кеши коллизий в ctx.
+  score_pat = (1, quality, used_area_sum, policy_sum, k_sum)
+  """
+  unavailable = ctx.unavailable
+  if unavailable and any(c.itemId in unavailable for c in group):
+    return _GroupEval("not_available", [c.itemId for c in group if c.itemId in unavailable])
+
+  if geom_key in ctx.collided:
+    ok, reasons = False, [REASON_COLLISION]
+  else:
+    # с placed, уже проверенными на прошлых итерациях, раскладка не пересекалась:
+    # сверяем только поставленные после них
+    n_placed = len(state.placed_index)
+    ok, reasons = _can_commit_group(state, group, geom, since=ctx.clear_upto.get(geom_key, 0))
+    if reasons == [REASON_COLLISION]:
+      ctx.collided.add(geom_key)
+    else:
+      ctx.clear_upto[geom_key] = n_placed
+  if not ok:
+    return _GroupEval(_pat_reason_bucket(reasons), reasons)
+
+  # policy hard rules (оставляем как есть; по умолчанию allow_hard_rules=False)
+  # и score в один проход по группе: сумма used_area и сумма K по паллетам
+  # (K нужна как слабый tie-breaker); на hard reject выходим сразу
+  vehicle, mode = ctx.vehicle, ctx.mode
+  pol_coeffs, pol_handler = ctx.pol_coeffs, ctx.pol_handler
+  policy_w = ctx.consts.policy_score_w
+  used_area_sum = 0.0
+  k_sum = 0.0
+  policy_sum = 0.0
+
+  for c in group:
+    it = state.items_by_id[c.itemId]
+    pol = evaluate_candidate_policy(it, c, vehicle, mode, allow_hard_rules=False, coeffs=pol_coeffs, handler=pol_handler)
+    if pol.hard_reject_reasons:
+      return _GroupEval("policy_hard", list(pol.hard_reject_reasons))
+
+    sc = score_candidate(state, c, mode)  # (1, K, used_area, policy_term?) зависит от objective.py
+    sc2 = _apply_policy_to_score(sc, pol, policy_w)  # policy в sc2[3]
+    k_sum += sc2[1]
+    used_area_sum += sc2[2]
+    policy_sum += sc2[3]
+
+  # ВАЖНО: геометрия впереди, policy остаётся, но ПОСЛЕ геометрии.
+  # K_sum последним, чтобы не "перетягивал" выбор паттерна.
+  pat_score = (1, geom.quality, used_area_sum, policy_sum, k_sum)
+  return _GroupEval(None, [], pat_score, geom.quality_dbg)
+
+
 def pack(items: List[Item], vehicle: Vehicle, task_id: str, transport_type: str, debug_log: DebugLogFn = None) -> PlanResult:
-  mode = detect_mode(items, vehicle)
+  mode, k_by_id = detect_mode_and_k(items, vehicle)
 
   state = PlanState(
     task_id=task_id,
     transport_type=transport_type,
     vehicle=vehicle,
     mode=mode,
+    debug_enabled=bool(getattr(SETTINGS, "DEBUG_EVENTS", True)),
   )
   state.init_free_rects()
+  # ячейка сетки коллизий под габариты паллет этого плана
+  state.placed_index = SpatialHash(cell=cell_for_sides([min(it.width, it.length) for it in items]))
   state.items_by_id = {it.id: it for it in items}
+  state.k_by_id = k_by_id
 
   state.emit("mode_detected", {
     "mode": mode.mode,
@@ -182,44 +430,61 @@ def pack(items: List[Item], vehicle: Vehicle, task_id: str, transport_type: str,
     "alpha": mode.alpha,
   })
 
-  remaining = items[:]
-  remaining.sort(key=lambda it: sort_key_for_queue(it, vehicle, mode))
+  # очередь по id в порядке sort_key_for_queue: снятие поставленных — pop по ключу,
+  # без пересборки списка на каждой итерации
+  remaining: Dict[str, Item] = {
+    it.id: it for it in sorted(items, key=lambda it: sort_key_for_queue(it, vehicle, mode))
+  }
+
+  consts = packer_consts(SETTINGS)
+  PATTERN_REJECT_LOG_LIMIT = consts.pattern_reject_log_limit
+  policy_w = consts.policy_score_w
 
-  PATTERN_REJECT_LOG_LIMIT = int(getattr(SETTINGS, "PATTERN_REJECT_LOG_LIMIT", 25))
+  # коэффициенты и режим policy не меняются за план: снимаем их один раз
+  pol_coeffs = policy_coeffs(SETTINGS)
+  pol_handler = mode_handler(mode)
+
+  # статика раскладок паттернов (см. PatternGeom), живёт весь план
+  pattern_geoms: Dict[PatternGeomKey, PatternGeom] = {}
+  # раскладки, уже упёршиеся в placed: placed только растёт, значит коллизия останется навсегда
+  # (OOB и внутренняя коллизия и так в PatternGeom; оси не монотонны — их не кешируем)
+  pattern_collided: Set[PatternGeomKey] = set()
+  pattern_clear_upto: Dict[PatternGeomKey, int] = {}
 
   while remaining:
-    window = remaining[:SETTINGS.TOP_N_WINDOW]
+    window = list(islice(remaining.values(), consts.top_n_window))
     candidates = generate_floor_candidates(state, window)
 
-    rem_ids = {it.id for it in remaining}
     pattern_groups = _group_pattern_candidates(candidates)
+    # паллеты кандидатов, которых уже нет в очереди: одна разность множеств на итерацию
+    # (обычно пустая — кандидаты строятся из окна очереди), тогда группы не сканируем вовсе
+    unavailable = {c.itemId for c in candidates}.difference(remaining.keys())
+
+    # базовая статистика (проход по кандидатам — только если debug включён)
+    def _candidates_generated() -> dict:
+      pat_count = sum(1 for c in candidates if c.patternId is not None)
+      return {
+        "count": len(candidates),
+        "window": len(window),
+        "singleCount": len(candidates) - pat_count,
+        "patternCandCount": pat_count,
+        "patternGroups": len(pattern_groups),
+      }
 
-    # базовая статистика
-    single_count = 0
-    pat_count = 0
-    for c in candidates:
-      if (c.get("meta") or {}).get("patternId"):
-        pat_count += 1
-      else:
-        single_count += 1
-
-    state.emit("candidates_generated", {
-      "count": len(candidates),
-      "window": len(window),
-      "singleCount": single_count,
-      "patternCandCount": pat_count,
-      "patternGroups": len(pattern_groups),
-    })
+    state.emit("candidates_generated", _candidates_generated)
 
     # держим отдельно лучший паттерн и лучший single, чтобы не смешивать шкалы
     best_pat_group: Optional[List[Candidate]] = None
     best_pat_score = None
-    best_pat_pid: Optional[str] = None
+    # quality (score_pat[1]) лучшего паттерна отдельным float: score_pat[0] всегда 1,
+    # так что кортежи почти всегда решаются по quality — сравниваем её первой,
+    # а полный кортеж только при равенстве (результат тот же, что у сравнения кортежей)
+    best_pat_q = 0.0
+    best_pat_pid: Optional[int] = None
     best_pat_dbg = None
 
     best_single: Optional[Candidate] = None
     best_single_score = None
-    best_single_pol = None
 
     # -------------------------
     # 1) паттерны: приоритет антифрагментации
@@ -229,89 +494,52 @@ def pack(items: List[Item], vehicle: Vehicle, task_id: str, transport_type: str,
     pattern_rejects_logged = 0
     pattern_reject_stats: Dict[str, int] = {}
 
-    for pid, group in pattern_groups.items():
-      if any(c["itemId"] not in rem_ids for c in group):
-        pattern_reject_stats["not_available"] = pattern_reject_stats.get("not_available", 0) + 1
-        if pattern_rejects_logged < PATTERN_REJECT_LOG_LIMIT:
-          missing = [c["itemId"] for c in group if c["itemId"] not in rem_ids]
-          state.emit("pattern_rejected", {
-            "patternId": pid,
-            "reason": "not_available",
-            "missingItemIds": missing[:20],
-            "groupSize": len(group),
-          })
-          pattern_rejects_logged += 1
-        continue
-
-      ok, reasons = _can_commit_group(state, group)
-      if not ok:
-        bucket = _pat_reason_bucket(reasons)
-        pattern_reject_stats[bucket] = pattern_reject_stats.get(bucket, 0) + 1
-        if pattern_rejects_logged < PATTERN_REJECT_LOG_LIMIT:
-          state.emit("pattern_rejected", {
-            "patternId": pid,
-            "reason": bucket,
-            "reasons": reasons[:20],
-            "groupSize": len(group),
-          })
-          pattern_rejects_logged += 1
-        continue
-
-      # policy hard rules (оставляем как есть; по умолчанию allow_hard_rules=False)
-      bad = False
-      group_pol_terms = []
-      hard_reasons: List[str] = []
-      for c in group:
-        it = state.items_by_id[c["itemId"]]
-        pol = evaluate_candidate_policy(it, c, vehicle, mode, allow_hard_rules=False)
-        if pol.hard_reject_reasons:
-          bad = True
-          hard_reasons.extend(pol.hard_reject_reasons)
-          break
-        group_pol_terms.append(pol)
+    pattern_ctx = _PatternCtx(
+      vehicle, mode, consts, pol_coeffs, pol_handler,
+      pattern_geoms, pattern_collided, pattern_clear_upto, unavailable,
+    )
 
-      if bad:
-        pattern_reject_stats["policy_hard"] = pattern_reject_stats.get("policy_hard", 0) + 1
+    # группы по убыванию верхней границы score (PatternGeom.score_bound): как только граница
+    # очередной группы ниже лучшего найденного score, остальные его тоже не превзойдут.
+    # Сортировка устойчивая, так что среди равных границ порядок (и tie-break) прежний
+    ranked = []
+    for pid, group in pattern_groups.items():
+      geom_key, geom = _group_geom(group, pattern_ctx)
+      ranked.append((pid, group, geom_key, geom))
+    ranked.sort(key=lambda r: r[3].score_bound, reverse=True)
+
+    pattern_skipped = 0
+    for i, (pid, group, geom_key, geom) in enumerate(ranked):
+      bound = geom.score_bound
+      if best_pat_score is not None and (
+        bound[1] < best_pat_q or (bound[1] == best_pat_q and bound < best_pat_score)
+      ):
+        pattern_skipped = len(ranked) - i
+        break
+
+      ev = _evaluate_group(state, group, geom_key, geom, pattern_ctx)
+      if ev.reason is not None:
+        pattern_reject_stats[ev.reason] = pattern_reject_stats.get(ev.reason, 0) + 1
         if pattern_rejects_logged < PATTERN_REJECT_LOG_LIMIT:
-          state.emit("pattern_rejected", {
-            "patternId": pid,
-            "reason": "policy_hard",
-            "reasons": hard_reasons[:20],
-            "groupSize": len(group),
-          })
+          state.emit("pattern_rejected", lambda: _pattern_rejected_payload(pid, group, ev))
           pattern_rejects_logged += 1
         continue
 
-      # сумма used_area и сумма K по паллетам (K нужна как слабый tie-breaker)
-      used_area_sum = 0.0
-      k_sum = 0.0
-      policy_sum = 0.0
-
-      for idx, c in enumerate(group):
-        sc = score_candidate(state, c, mode)  # (1, K, used_area, policy_term?) зависит от objective.py
-        pol = group_pol_terms[idx]
-        sc2 = _apply_policy_to_score(sc, pol)  # policy в sc2[3]
-        k_sum += float(sc2[1])
-        used_area_sum += float(sc2[2])
-        policy_sum += float(sc2[3])
-
-      quality, qdbg = _packing_quality(group)
-
-      # ВАЖНО: геометрия впереди, policy остаётся, но ПОСЛЕ геометрии.
-      # K_sum последним, чтобы не "перетягивал" выбор паттерна.
-      pat_score = (1, float(quality), float(used_area_sum), float(policy_sum), float(k_sum))
-
-      if best_pat_score is None or pat_score > best_pat_score:
+      pat_score = ev.score
+      q = pat_score[1]
+      if best_pat_score is None or q > best_pat_q or (q == best_pat_q and pat_score > best_pat_score):
         best_pat_score = pat_score
+        best_pat_q = q
         best_pat_group = group
         best_pat_pid = pid
-        best_pat_dbg = qdbg
+        best_pat_dbg = ev.quality_dbg
 
     if pattern_groups:
       state.emit("pattern_reject_summary", {
         "groups": len(pattern_groups),
         "logged": pattern_rejects_logged,
         "stats": pattern_reject_stats,
+        "skippedByBound": pattern_skipped,
         "logLimit": PATTERN_REJECT_LOG_LIMIT,
       })
 
@@ -319,33 +547,59 @@ def pack(items: List[Item], vehicle: Vehicle, task_id: str, transport_type: str,
     # 2) single: сравнение по K (а policy остаётся как tie-breaker)
     # score_single = (1, K, used_area, policy_term)
     # -------------------------
-    for cand in candidates:
-      if (cand.get("meta") or {}).get("patternId"):
-        continue
-
-      ok, reasons = state.can_place(cand)
-      if not ok:
-        continue
-
-      it = state.items_by_id[cand["itemId"]]
-      pol = evaluate_candidate_policy(it, cand, vehicle, mode, allow_hard_rules=False)
-      if pol.hard_reject_reasons:
-        continue
-
+    # single нужен только если паттерна нет (см. выбор ниже), иначе не ранжируем вовсе.
+    # Score без policy — (1, K, used_area) — известен без проверок, а policy только
+    # tie-breaker: идём по убыванию (K, used_area) и зовём can_place_fast() до первого
+    # допустимого, дальше — только по кандидатам с тем же (K, used_area).
+    # Сортировка устойчивая, так что при равных score побеждает тот же кандидат, что раньше.
+    singles: List[Candidate] = []
+    if best_pat_group is None:
+      k_by_id = state.k_by_id
+      ranked_singles = sorted(
+        (c for c in candidates if c.patternId is None),
+        key=lambda c: (k_by_id[c.itemId], c.area),
+        reverse=True,
+      )
+      top_key = None
+      for c in ranked_singles:
+        key = (k_by_id[c.itemId], c.area)
+        if top_key is not None and key != top_key:
+          break
+        if state.can_place_fast(c):
+          top_key = key
+          singles.append(c)
+
+    # policy считаем пачкой на паллету: hard rules выключены (allow_hard_rules=False),
+    # так что нужны только (penalty, bonus) по z кандидата
+    single_pos_by_item: Dict[str, List[int]] = {}
+    for i, c in enumerate(singles):
+      single_pos_by_item.setdefault(c.itemId, []).append(i)
+
+    single_pen = [0.0] * len(singles)
+    single_bon = [0.0] * len(singles)
+    for item_id, positions in single_pos_by_item.items():
+      pens, bons = evaluate_candidates_policy(
+        state.items_by_id[item_id], [singles[i].z for i in positions], vehicle, mode,
+        coeffs=pol_coeffs, handler=pol_handler,
+      )
+      for i, p, b in zip(positions, pens, bons):
+        single_pen[i] = p
+        single_bon[i] = b
+
+    for i, cand in enumerate(singles):
       sc = score_candidate(state, cand, mode)
-      sc = _apply_policy_to_score(sc, pol)
+      sc = _apply_policy_terms(sc, single_bon[i], single_pen[i], policy_w)
 
       if best_single_score is None or sc > best_single_score:
         best_single_score = sc
         best_single = cand
-        best_single_pol = pol
 
     # -------------------------
     # 3) выбор: если есть валидный паттерн — берём его (паттерны = антифрагментация)
     # иначе берём single.
     # -------------------------
     if best_pat_group is None and best_single is None:
-      for it in remaining:
+      for it in remaining.values():
         it.status = "unplaced"
         state.unplaced.append(it)
       state.emit("unplaced_all_remaining", {"count": len(remaining)})
@@ -355,9 +609,9 @@ def pack(items: List[Item], vehicle: Vehicle, task_id: str, transport_type: str,
       committed_ids: List[str] = []
       for c in best_pat_group:
         state.commit(c)
-        committed_ids.append(c["itemId"])
+        committed_ids.append(c.itemId)
 
-      state.emit("pattern_committed", {
+      state.emit("pattern_committed", lambda: {
         "patternId": best_pat_pid,
         "count": len(best_pat_group),
         "itemIds": committed_ids,
@@ -365,29 +619,40 @@ def pack(items: List[Item], vehicle: Vehicle, task_id: str, transport_type: str,
         "packing": best_pat_dbg,
       })
 
-      committed_set = set(committed_ids)
-      remaining = [it for it in remaining if it.id not in committed_set]
+      for cid in committed_ids:
+        remaining.pop(cid, None)
       continue
 
     # single commit
     assert best_single is not None
     state.commit(best_single)
-    payload = {"itemId": best_single["itemId"], "kind": best_single["kind"], "score": best_single_score}
-    if best_single_pol:
-      payload["policy"] = {
-        "zone": best_single_pol.tags.get("zone"),
-        "class": best_single_pol.tags.get("class"),
-        "hi": best_single_pol.tags.get("hi"),
-        "bonus": best_single_pol.zone_bonus,
-        "penalty": best_single_pol.zone_penalty,
-      }
-    state.emit("candidate_chosen", payload)
 
-    remaining = [it for it in remaining if it.id != best_single["itemId"]]
+    def _candidate_chosen() -> dict:
+      # полный PolicyDecision (теги для debug) — только для победителя и только для debug
+      pol = evaluate_candidate_policy(
+        state.items_by_id[best_single.itemId], best_single, vehicle, mode,
+        allow_hard_rules=False, coeffs=pol_coeffs, handler=pol_handler,
+      )
+      payload = {"itemId": best_single.itemId, "kind": best_single.kind, "score": best_single_score}
+      if pol:
+        tags = pol.tags
+        payload["policy"] = {
+          "zone": tags.get("zone"),
+          "class": tags.get("class"),
+          "hi": tags.get("hi"),
+          "bonus": pol.zone_bonus,
+          "penalty": pol.zone_penalty,
+        }
+      return payload
+
+    state.emit("candidate_chosen", _candidate_chosen)
+
+    remaining.pop(best_single.itemId, None)
 
   res = state.snapshot()
 
-  if debug_log:
+  # NOOP_LOG (solve() без лога) — не гоняем по нему все события
+  if debug_log and debug_log is not NOOP_LOG:
     for e in res.debug:
       debug_log(e.evt, e.payload)
 
@@ -4,6 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Callable, List, Optional
 
+from debug.events import NOOP_LOG
 from domain.types import PlanResult
 
 DebugLogFn = Optional[Callable[[str, dict], None]]
@@ -19,26 +20,45 @@ class ReoptConfig:
   # - time budget
 
 
-def reopt(plan: PlanResult, debug_log: DebugLogFn = None, cfg: ReoptConfig = ReoptConfig()) -> PlanResult:
+# reopt по умолчанию выключен: один экземпляр конфига на модуль, а не ReoptConfig() в каждом solve()
+_DISABLED_CFG = ReoptConfig(enabled=False)
+
+
+def _has_log(debug_log: DebugLogFn) -> bool:
+  return debug_log is not None and debug_log is not NOOP_LOG
+
+
+def reopt(plan: PlanResult, debug_log: DebugLogFn = None, cfg: ReoptConfig = _DISABLED_CFG) -> PlanResult:
   """
   MVP: заглушка.
   Держит интерфейс и debug события, чтобы пайплайн был цельным:
   packer -> (reopt?) -> result
   """
   if not cfg.enabled:
-    if debug_log:
+    # без лога payload события даже не собираем
+    if _has_log(debug_log):
       debug_log("reopt_skipped", {"enabled": False})
     return plan
 
+  debug_log = debug_log or NOOP_LOG
+
   # Здесь позже будет локальный поиск:
   # - попытка перестановок для уплотнения (free_rects rebuild)
   # - попытка заменить 2-3 item на другие по K, сохраняя оси
   # - попытка "почти влезает": выкинуть 1 низкоценный и вставить 2 высокоценных
-  if debug_log:
-    debug_log("reopt_started", {"max_iters": cfg.max_iters, "placed": len(plan.placed), "unplaced": len(plan.unplaced)})
+  debug_log("reopt_started", {"max_iters": cfg.max_iters, "placed": len(plan.placed), "unplaced": len(plan.unplaced)})
 
   # Сейчас — без изменений
-  if debug_log:
-    debug_log("reopt_done", {"changed": False})
+  debug_log("reopt_done", {"changed": False})
 
   return plan
+
+
+def reopt_or_passthrough(plan: PlanResult, debug_log: DebugLogFn = None, cfg: ReoptConfig = _DISABLED_CFG) -> PlanResult:
+  """
+  Быстрый путь для вызывающих: выключенный reopt без лога — сразу plan, без вызова reopt().
+  С логом идём в reopt(), чтобы событие reopt_skipped не пропало.
+  """
+  if not cfg.enabled and not _has_log(debug_log):
+    return plan
+  return reopt(plan, debug_log=debug_log, cfg=cfg)
@@ -0,0 +1,60 @@
+# tests/test_free_rects.py
+import random
+import unittest
+
+from geometry.free_rects import (
+  FreeRects,
+  merge_adjacent,
+  prune_contained,
+  rect_intersects,
+  split_rect,
+)
+
+
+def _reserve_reference(rects, used):
+  # reserve() в исходном виде: split по всем rect-ам, prune, жадный merge_adjacent
+  new_rects = []
+  for r in rects:
+    if not rect_intersects(r, used):
+      new_rects.append(r)
+    else:
+      new_rects.extend(split_rect(r, used))
+  new_rects = prune_contained(new_rects)
+  return merge_adjacent(new_rects, eps=1e-6)
+
+
+class ReserveMatchesMergeAdjacentTest(unittest.TestCase):
+  """
+  FreeRects.reserve() должен давать тот же набор rect-ов и в том же порядке,
+  что и прямой split + prune + merge_adjacent: порядок влияет на выбор кандидатов.
+  """
+
+  def _run_plan(self, seed: int) -> None:
+    rng = random.Random(seed)
+    vehicle = {"innerWidth": 2.45, "innerLength": rng.choice([7.2, 13.6]), "innerHeight": 2.6}
+    fr = FreeRects.init_for_vehicle(vehicle)
+    ref = fr.list()
+
+    for _ in range(40):
+      if not fr.rects:
+        break
+      # как packer: паллета в углу одного из свободных rect-ов
+      r = rng.choice(fr.rects)
+      dx, dz = rng.choice([(0.8, 1.2), (1.2, 0.8), (1.0, 1.2), (1.2, 1.0), (1.4, 1.2)])
+      if r[1] - r[0] + 1e-9 < dx or r[3] - r[2] + 1e-9 < dz:
+        continue
+      x0 = r[0] if rng.random() < 0.5 else r[1] - dx
+      z0 = r[2] if rng.random() < 0.5 else r[3] - dz
+      used = (x0, x0 + dx, z0, z0 + dz)
+
+      fr.reserve(used)
+      ref = _reserve_reference(ref, used)
+      self.assertEqual(fr.rects, ref, f"seed={seed}, used={used}")
+
+  def test_reserve_matches_reference(self) -> None:
+    for seed in range(300):
+      self._run_plan(seed)
+
+
+if __name__ == "__main__":
+  unittest.main()